@@ -0,0 +1,151 @@
+import pandas as pd
+
+import common_path  # noqa: F401 - puts ../common on sys.path
+from downsample import lttb, ohlc_bars
+
+
+def format_number(num):
+    try:
+        if pd.isna(num):
+            return "-"
+        if abs(num) >= 1e12:
+            return f"{num/1e12:.2f}T"
+        elif abs(num) >= 1e9:
+            return f"{num/1e9:.2f}B"
+        elif abs(num) >= 1e6:
+            return f"{num/1e6:.2f}M"
+        elif abs(num) >= 1e3:
+            return f"{num/1e3:.2f}K"
+        return f"{num:.2f}"
+    except Exception as e:
+        return "-"
+
+
+def percent(info, key):
+    return f"{info.get(key, 0)*100:.2f}%" if info.get(key) else "-"
+
+
+def price_summary(info):
+    current_price = info.get('currentPrice', info.get('regularMarketPrice', 0))
+    previous_close = info.get('previousClose', current_price)
+    target_price = info.get('targetMeanPrice', None)
+    return {
+        "current_price": current_price,
+        "previous_close": previous_close,
+        "change_percent": ((current_price - previous_close) / previous_close) * 100,
+        "target_price": target_price,
+        "potential": ((target_price - current_price) / current_price) * 100 if target_price else None,
+    }
+
+
+def indicator_tables(info):
+    # Same sections and labels as the single-analysis tab; missing values shown as "-"
+    market_cap = info.get('marketCap')
+    tables = {
+        "Valuation": {
+            "P/E": info.get('trailingPE'),
+            "P/B": info.get('priceToBook'),
+            "EV/EBITDA": info.get('enterpriseToEbitda'),
+            "Dividend Yield": percent(info, 'dividendYield'),
+            "Book Value/Share": info.get('bookValue'),
+            "Earnings/Share": info.get('trailingEps'),
+            "Market Cap": format_number(market_cap) if market_cap else None,
+        },
+        "Leverage": {
+            "Net Debt / Equity": info.get('debtToEquity'),
+            "Net Debt / EBITDA": info.get('debtToEbitda'),
+            "Current Ratio": info.get('currentRatio'),
+        },
+        "Efficiency": {
+            "Gross Margin": percent(info, 'grossMargins'),
+            "EBITDA Margin": percent(info, 'ebitdaMargins'),
+            "Net Margin": percent(info, 'profitMargins'),
+        },
+        "Profitability": {
+            "ROE": percent(info, 'returnOnEquity'),
+            "ROA": percent(info, 'returnOnAssets'),
+            "ROIC": percent(info, 'returnOnInvestedCapital'),
+            "Asset Turnover": info.get('assetTurnover'),
+        },
+    }
+    return {section: {k: v if v else '-' for k, v in rows.items()} for section, rows in tables.items()}
+
+
+def comparison_row(ticker, info):
+    return {
+        "Ticker": ticker,
+        "Nome": info.get('longName', ticker),
+        "Preço Atual": info.get('currentPrice', info.get('regularMarketPrice', 0)),
+        "Preço-Alvo": info.get('targetMeanPrice', None),
+        "Potencial": ((info.get('targetMeanPrice', 0) - info.get('currentPrice', 1)) / info.get('currentPrice', 1)) * 100 if info.get('targetMeanPrice') else None,
+        "P/L": info.get('trailingPE'),
+        "P/VP": info.get('priceToBook'),
+        "Dividend Yield": info.get('dividendYield', 0)*100 if info.get('dividendYield') else None,
+        "ROE": info.get('returnOnEquity', 0)*100 if info.get('returnOnEquity') else None,
+        "Margem Líq.": info.get('profitMargins', 0)*100 if info.get('profitMargins') else None,
+        "Valor Mercado": info.get('marketCap')
+    }
+
+
+def format_comparison(comparison_df):
+    formatted_df = comparison_df.copy()
+    formatted_df['Valor Mercado'] = formatted_df['Valor Mercado'].apply(format_number)
+    formatted_df['Potencial'] = formatted_df['Potencial'].apply(lambda x: f"{x:.2f}%" if pd.notnull(x) else "-")
+
+    for col in ['Preço Atual', 'Preço-Alvo', 'P/L', 'P/VP', 'Dividend Yield', 'ROE', 'Margem Líq.']:
+        formatted_df[col] = formatted_df[col].apply(lambda x: f"{x:.2f}" if pd.notnull(x) else "-")
+    return formatted_df
+
+
+def candlestick_figure(hist, ticker, period, target_price=None):
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    bars = "daily"
+    if not hist.empty:
+        # Long histories become weekly or monthly candles so the browser gets a few hundred bars
+        hist, bars = ohlc_bars(hist)
+        fig.add_trace(go.Candlestick(
+            x=hist.index,
+            open=hist['Open'],
+            high=hist['High'],
+            low=hist['Low'],
+            close=hist['Close'],
+            name='Preço'
+        ))
+
+    if target_price:
+        fig.add_hline(y=target_price, line_dash="dot",
+                     annotation_text=f"Preço-Alvo: {target_price:.2f}",
+                     line_color="green")
+
+    fig.update_layout(
+        title=f"Price History - {ticker} ({period})" + (f", {bars} bars" if bars != "daily" else ""),
+        xaxis_rangeslider_visible=False,
+        height=400
+    )
+    return fig
+
+
+def comparison_figure(histories):
+    import plotly.graph_objects as go
+
+    fig_compare = go.Figure()
+
+    for ticker, hist in histories.items():
+        # LTTB keeps the peaks of each line; WebGL traces keep many tickers responsive
+        hist = hist.iloc[lttb(hist['Close'].to_numpy())]
+        fig_compare.add_trace(go.Scattergl(
+            x=hist.index,
+            y=hist['Close'],
+            name=ticker,
+            mode='lines'
+        ))
+
+    fig_compare.update_layout(
+        title="Price Comparison (12 months)",
+        xaxis_title="Date",
+        yaxis_title="Price (USD)",
+        height=400
+    )
+    return fig_compare
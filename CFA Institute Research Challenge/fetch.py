@@ -0,0 +1,108 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import common_path  # noqa: F401 - puts ../common on sys.path
+from data_cache import cache
+from service_client import service
+
+MAX_WORKERS = 8
+
+
+# With DATA_SERVICE_URL set, loaders go through the shared data service instead of yfinance.
+# yfinance is imported on first use so the page can render before it loads.
+
+def get_info(ticker):
+    def load():
+        if service:
+            return service.info(ticker)
+        import yfinance as yf
+
+        return yf.Ticker(ticker).info
+
+    return cache.get(ticker, "info", load)
+
+
+def get_history(ticker, period="1y"):
+    def load():
+        if service:
+            return service.history(ticker, period)
+        import yfinance as yf
+
+        return yf.Ticker(ticker).history(period=period)
+
+    return cache.get(ticker, f"history:{period}", load)
+
+
+def get_statement(ticker, name):
+    # name is one of "financials", "balance_sheet" or "cashflow"
+    def load():
+        if service:
+            return service.statement(ticker, name)
+        import yfinance as yf
+
+        return getattr(yf.Ticker(ticker), name)
+
+    return cache.get(ticker, name, load)
+
+
+def fetch_infos(tickers, pool):
+    # `.info` has no batch endpoint, so each lookup runs on its own worker, counted in the caller's run
+    futures = {ticker: pool.submit(contextvars.copy_context().run, get_info, ticker) for ticker in tickers}
+    infos, errors = {}, {}
+    for ticker, future in futures.items():
+        try:
+            infos[ticker] = future.result()
+        except Exception as e:
+            errors[ticker] = e
+    return infos, errors
+
+
+def fetch_histories(tickers, period="1y"):
+    # Cached histories are reused; the rest come from one batched download
+    dataset = f"history:{period}"
+    histories, missing = {}, []
+    for ticker in tickers:
+        found, hist = cache.lookup(ticker, dataset)
+        if found:
+            histories[ticker] = hist
+        else:
+            missing.append(ticker)
+    if not missing:
+        return histories
+
+    cache.miss(len(missing))
+    if service:
+        fetched = service.histories(missing, period)
+        cache.loaded(fetched)
+        for ticker, hist in fetched.items():
+            cache.put(ticker, dataset, hist)
+        histories.update(fetched)
+        return {t: histories[t] for t in tickers if t in histories}
+    import yfinance as yf
+
+    data = yf.download(missing, period=period, group_by="ticker", auto_adjust=True, progress=False)
+    cache.loaded(data)
+    if not isinstance(data.columns, pd.MultiIndex):
+        fetched = {missing[0]: data.dropna(how="all")}
+    else:
+        available = set(data.columns.get_level_values(0))
+        fetched = {t: data[t].dropna(how="all") for t in missing if t in available}
+    for ticker, hist in fetched.items():
+        cache.put(ticker, dataset, hist)
+    histories.update(fetched)
+    return {t: histories[t] for t in tickers if t in histories}
+
+
+def fetch_comparison(tickers, period="1y", max_workers=MAX_WORKERS):
+    # The batched history download overlaps with the metadata lookups
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        histories = pool.submit(contextvars.copy_context().run, fetch_histories, tickers, period)
+        infos, errors = fetch_infos(tickers, pool)
+        try:
+            hists = histories.result()
+        except Exception as e:
+            errors["histórico de preços"] = e
+            hists = {}
+    return infos, hists, errors
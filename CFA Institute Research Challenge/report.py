@@ -0,0 +1,99 @@
+"""Headless batch reports with the same tables and charts as the app.
+
+    python report.py AAPL MSFT PETR4.SA
+    python report.py --all --period 5y --out reports
+
+Writes <out>/<ticker>/report.html, indicators.csv and history.csv for each
+ticker (plus chart.png with --png, which needs kaleido), and a combined
+<out>/comparison.csv in the format of the app's comparison download.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from analysis import candlestick_figure, comparison_row, format_comparison, indicator_tables
+from fetch import get_history, get_info
+
+PERIODS = {"1y": "1 year", "5y": "5 years", "10y": "10 years"}
+TICKERS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Desafio Itaú Asset Quantamental", "tickers.csv")
+
+
+def load_universe(path=TICKERS_CSV):
+    codes = pd.read_csv(path, header=None).iloc[:, 1].astype(str)
+    return [c + ".SA" for c in codes if c != '0']
+
+
+def report_ticker(ticker, out_dir, period="1y", png=False):
+    info = get_info(ticker)
+    if not info or 'currentPrice' not in info:
+        raise ValueError("Ticker não encontrado ou dados indisponíveis")
+    hist = get_history(ticker, period)
+
+    path = os.path.join(out_dir, ticker)
+    os.makedirs(path, exist_ok=True)
+
+    tables = indicator_tables(info)
+    indicators = pd.DataFrame(
+        [{"Section": section, "Metric": metric, "Value": value}
+         for section, rows in tables.items() for metric, value in rows.items()]
+    )
+    indicators.to_csv(os.path.join(path, "indicators.csv"), index=False)
+    hist.to_csv(os.path.join(path, "history.csv"))
+
+    fig = candlestick_figure(hist, ticker, PERIODS[period], info.get('targetMeanPrice'))
+    sections = "".join(
+        f"<h3>{section}</h3>" + indicators[indicators["Section"] == section][["Metric", "Value"]].to_html(index=False)
+        for section in tables
+    )
+    with open(os.path.join(path, "report.html"), "w", encoding="utf-8") as f:
+        f.write(f"<html><head><meta charset='utf-8'><title>{ticker}</title></head><body>"
+                f"<h1>{info.get('longName', ticker)}</h1>"
+                f"<p>Sector: {info.get('sector', '-')} | Industry: {info.get('industry', '-')}</p>"
+                f"{fig.to_html(full_html=False, include_plotlyjs='cdn')}{sections}</body></html>")
+    if png:
+        fig.write_image(os.path.join(path, "chart.png"))
+
+    return comparison_row(ticker, info)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("tickers", nargs="*")
+    parser.add_argument("--all", action="store_true", help="every ticker in tickers.csv")
+    parser.add_argument("--tickers-file", default=TICKERS_CSV)
+    parser.add_argument("--period", default="1y", choices=list(PERIODS))
+    parser.add_argument("--out", default="reports")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--png", action="store_true")
+    args = parser.parse_args()
+
+    tickers = [t.upper() for t in args.tickers]
+    if args.all:
+        tickers += load_universe(args.tickers_file)
+    if not tickers:
+        parser.error("pass tickers or --all")
+    tickers = list(dict.fromkeys(tickers))
+
+    rows, failed = {}, 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(report_ticker, t, args.out, args.period, args.png): t for t in tickers}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                rows[ticker] = future.result()
+                print(f"{ticker}: ok")
+            except Exception as e:
+                failed += 1
+                print(f"{ticker}: {e}", file=sys.stderr)
+
+    if rows:
+        comparison = pd.DataFrame([rows[t] for t in tickers if t in rows])
+        format_comparison(comparison).to_csv(os.path.join(args.out, "comparison.csv"), index=False)
+    print(f"{len(rows)} reports written to {args.out}, {failed} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import numpy as np
+
+TRADING_DAYS = 252
+
+
+def as_array(prices):
+    # (dates x assets) float64 block, forward-filled across holidays
+    return ffill(np.ascontiguousarray(np.asarray(prices, dtype=np.float64)))
+
+
+def ffill(a):
+    mask = np.isnan(a)
+    if not mask.any():
+        return a
+    idx = np.where(mask, 0, np.arange(a.shape[0])[:, None])
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return a[idx, np.arange(a.shape[1])]
+
+
+def equal_weights(n):
+    return np.full(n, 1.0 / n)
+
+
+def basket_values(prices, weights):
+    # Buy-and-hold basket holding `weights` shares of each asset; weights is (assets,) or (portfolios, assets)
+    return prices @ np.atleast_2d(weights).T
+
+
+def normalize(values, base=100.0):
+    first = values[np.argmax(np.isfinite(values), axis=0), np.arange(values.shape[1])]
+    return base * values / first
+
+
+def returns(values):
+    return values[1:] / values[:-1] - 1
+
+
+def metrics(values, benchmark, risk_free=0.0):
+    """Total and annualized return, volatility, Sharpe, max drawdown and beta for every column of `values`."""
+    r = returns(values)
+    rb = returns(benchmark.reshape(-1, 1))
+
+    valid = np.isfinite(r)
+    n = valid.sum(axis=0)
+    r0 = np.where(valid, r, 0.0)
+    mean = r0.sum(axis=0) / n
+    dev = np.where(valid, r - mean, 0.0)
+    vol = np.sqrt((dev ** 2).sum(axis=0) / (n - 1)) * np.sqrt(TRADING_DAYS)
+    sharpe = (mean * TRADING_DAYS - risk_free) / vol
+
+    both = valid & np.isfinite(rb)
+    nb = both.sum(axis=0)
+    rb_mean = np.where(both, rb, 0.0).sum(axis=0) / nb
+    r_mean = np.where(both, r, 0.0).sum(axis=0) / nb
+    rb_dev = np.where(both, rb - rb_mean, 0.0)
+    cov = (np.where(both, r - r_mean, 0.0) * rb_dev).sum(axis=0) / (nb - 1)
+    beta = cov / ((rb_dev ** 2).sum(axis=0) / (nb - 1))
+
+    peak = np.fmax.accumulate(values, axis=0)
+    drawdown = np.nanmin(values / peak - 1, axis=0)
+    total = normalize(values, 1.0)[-1] - 1
+
+    return {
+        "return": total,
+        "annual_return": mean * TRADING_DAYS,
+        "volatility": vol,
+        "sharpe": sharpe,
+        "max_drawdown": drawdown,
+        "beta": beta,
+    }
@@ -1,49 +1,89 @@
+import os
+import time
 import streamlit as st
 import pandas as pd
 import numpy as np
-import yfinance as yf
-import plotly.express as px
+import json
 from datetime import datetime
-import requests
-from streamlit_extras.metric_cards import style_metric_cards
-from streamlit_extras.grid import grid
+import price_store
+from price_store import PriceStore
+from panel import PanelStore
+import common_path  # noqa: F401 - puts ../common on sys.path
+from service_client import service
+import analytics
+import optimizer
+import backtest
+import downsample
+from rolling import RollingMetrics
+import correlation
+from correlation import CoMoments
+from screener import PERCENT, Screener, screen
+from prefetch import Popularity, Scheduler, market_open, yf_fetch
+from profiling import debug_panel, profiler
+from logos import LogoCache
+from live import INTERVAL, FileFeed, LivePanel, yf_poll
 
 st.set_page_config(layout="wide")
 
-st.title("Investment Analysis")
-
-st.sidebar.image("itau.svg", use_column_width=True)
-
 @st.cache_data
+def get_ticker_meta():
+    # Precompiled by build_tickers.py; without it only the codes from tickers.csv are known
+    try:
+        with open("tickers.json", encoding="utf-8") as f:
+            return {t["code"]: t for t in json.load(f)}
+    except FileNotFoundError:
+        with open("tickers.csv") as f:
+            codes = [line.strip().split(",")[1] for line in f if line.strip()]
+        return {c: {"code": c} for c in codes if c != '0'}
+
 def get_tickers():
-    ticker_list = pd.read_csv("tickers.csv", header=None)
-    options = ticker_list.iloc[:, 1].tolist() 
-    options = [t for t in options if t != '0']  
-    return options
+    return list(get_ticker_meta())
+
+@st.cache_resource
+def get_price_store():
+    # With DATA_SERVICE_URL set the service owns the store and every upstream call
+    if service:
+        return service
+    return PriceStore(fetch=profiler.track_fetch(price_store.yf_fetch))
+
+@st.cache_resource(max_entries=32)
+def load_panel(tickers, start_date, end_date, version):
+    # One read-only memory-mapped block per tickers/date window and store version, shared by every session
+    return PanelStore(get_price_store()).get(tickers, start_date, end_date)
+
+def get_panel(tickers, start_date, end_date):
+    return load_panel(tickers, start_date, end_date, get_price_store().version(tickers))
 
 def build_sidebar():
-    options = get_tickers()  
+    meta = get_ticker_meta()
     st.title("Select Companies")
 
-    tickers = st.multiselect(label="Select Companies", options=options, placeholder='Codes')
+    tickers = st.multiselect(label="Select Companies", options=list(meta), placeholder='Codes',
+                             format_func=lambda c: f"{c} · {meta[c]['name']}" if meta[c].get("name") else c)
+    # Only codes just added count as selections, so early picks are not counted again on every change
+    added = [t for t in tickers if t not in st.session_state.get("recorded_tickers", [])]
+    if added:
+        get_popularity().record(added)
+    st.session_state["recorded_tickers"] = tickers
     tickers = [t + ".SA" for t in tickers]  
 
-    start_date = st.date_input("From", format="DD/MM/YYYY", value=datetime(2023, 1, 2))
-    end_date = st.date_input("To", format="DD/MM/YYYY", value="today")
+    start_date = st.date_input("From", format="DD/MM/YYYY", value=datetime(2023, 1, 2), key="start_date")
+    end_date = st.date_input("To", format="DD/MM/YYYY", value="today", key="end_date")
+
+    st.toggle("Live mode", key="live")
+    if st.session_state["live"]:
+        st.number_input("Refresh every (s)", min_value=5, max_value=600, value=INTERVAL, key="live_interval")
 
     if tickers:
         try:
-            prices = yf.download(tickers + ["^BVSP"], start=start_date, end=end_date)["Adj Close"]
+            with profiler.stage("fetch", "prices"):
+                panel = get_panel(tuple(tickers + ["^BVSP"]), start_date, end_date)
             
-            if prices.empty:
+            if not len(panel.index):
                 st.error("Não foram encontrados dados para os tickers selecionados.")
                 return None, None
             
-            if len(tickers) == 1:
-                prices = prices.to_frame()
-                prices.columns = [tickers[0].rstrip(".SA")]
-            
-            return tickers, prices
+            return tickers, panel
         
         except Exception as e:
             st.error(f"Erro ao baixar dados: {str(e)}")
@@ -51,59 +91,131 @@ def build_sidebar():
 
     return None, None
 
-def build_main(tickers, prices):
-    index_col = prices.columns[-1]  
+@st.cache_data
+def get_frontier(asset_prices):
+    # Moments and frontier are computed once per tickers/date window and reused across reruns
+    mu, cov = optimizer.moments(analytics.as_array(asset_prices))
+    return optimizer.frontier(mu, cov)
+
+@st.cache_resource
+def get_popularity():
+    return Popularity()
+
+@st.cache_resource
+def get_scheduler():
+    # Runs on its own thread for the lifetime of the server, outside any script run
+    return Scheduler(fetch=yf_fetch(get_price_store()), popularity=get_popularity()).start()
+
+@st.cache_resource
+def get_logos():
+    # LOGO_PREFETCH=0 keeps the app offline: missing logos show the placeholder
+    logos = LogoCache()
+    if os.environ.get("LOGO_PREFETCH", "1") == "1":
+        logos.prefetch_async(get_tickers())
+    return logos
+
+@st.cache_resource
+def get_screener():
+    return Screener()
+
+def get_comoments(universe, window, start_date):
+    # One incremental state per session, like get_rolling; moving the end date only adds the new days
+    key = (universe, window, start_date)
+    if st.session_state.get("comoments_key") != key:
+        st.session_state["comoments_key"] = key
+        st.session_state["comoments"] = CoMoments(window)
+    return st.session_state["comoments"]
 
-    weights = np.ones(len(tickers)) / len(tickers)
-    prices['portfolio'] = prices.drop(index_col, axis=1) @ weights
-    norm_prices = 100 * prices / prices.iloc[0]
-    returns = prices.pct_change()[1:]
-    vols = returns.std() * np.sqrt(252)
-    rets = (norm_prices.iloc[-1] - 100) / 100
+def get_rolling(columns, index, r, rb, window):
+    # One incremental state per session, replaced when the selection or window changes;
+    # reruns on the same selection only process new dates
+    key = (tuple(columns), window)
+    if st.session_state.get("rolling_key") != key:
+        st.session_state["rolling_key"] = key
+        st.session_state["rolling"] = RollingMetrics(window)
+    return st.session_state["rolling"].update(index, r, rb)
 
-    mygrid = grid(5, 5, 5, 5, 5, 5, vertical_align="top")
-    for ticker in prices.columns:
-        c = mygrid.container(border=True)
-        c.subheader(ticker, divider="red")
-        colA, colB, colC = c.columns(3)
+def zoom_slider(index):
+    # Charts only get ~downsample.POINTS rows, so narrowing the range brings back daily detail
+    if len(index) < 2:
+        return np.ones(len(index), dtype=bool)
+    first, last = downsample.bounds(index)
+    start, end = st.slider("Zoom", min_value=first, max_value=last, value=(first, last), format="DD/MM/YYYY")
+    return downsample.window(index, start, end)
+
+def build_main(tickers, panel):
+    with profiler.stage("compute", "metrics"):
+        # Last column is the ^BVSP benchmark; derived series live on the shared panel
+        prices = panel.frame
+        columns = panel.columns + ["portfolio"]
+
+        stats = panel.stats
+        norm_prices = pd.DataFrame(panel.normalized, index=prices.index, columns=columns, copy=False)
+        vols = pd.Series(stats["volatility"], index=columns)
+        rets = pd.Series(stats["return"], index=columns)
+        sharpe = pd.Series(stats["sharpe"], index=columns)
+
+    with profiler.stage("format", "cards"):
+        from streamlit_extras.grid import grid
+        from streamlit_extras.metric_cards import style_metric_cards
+
+        meta = get_ticker_meta()
+        mygrid = grid(5, 5, 5, 5, 5, 5, vertical_align="top")
+        for ticker in columns:
+            c = mygrid.container(border=True)
+            c.subheader(ticker, divider="red")
+            colA, colB, colC = c.columns(3)
 
         
-        ticker_clean = ticker.rstrip('.SA')  
-        logo_url = None
-
-        if ticker == "^BVSP":
-            logo_url = "bov.png"  
-        elif ticker == "portfolio":
-            logo_url = "chart.svg"  
-        else:
-            stock_info = yf.Ticker(ticker_clean).info
-            logo_url = stock_info.get('logo_url', None)
-            if not logo_url:
-                logo_url = f'https://raw.githubusercontent.com/thefintz/icones-b3/main/icones/{ticker_clean}.png'  # Imagem padrão
-
-        if logo_url:
+            ticker_clean = ticker.rstrip('.SA')  
+            # Logos come from the local cache, so cards never wait on the network
+            info = meta.get(ticker_clean, {})
+            if ticker == "portfolio":
+                logo_url = "chart.svg"
+            elif info.get("logo") and os.path.exists(info["logo"]):
+                logo_url = info["logo"]
+            else:
+                logo_url = get_logos().path(ticker_clean)
             colA.image(logo_url, width=100) 
-        else:
-            colA.write("🔍 Logo não disponível")
 
-        colA.write(f"🏢 {ticker_clean}")
+            colA.write(f"🏢 {ticker_clean}")
+            if info.get("sector"):
+                colA.caption(info["sector"])
 
-        colB.metric(label="Return", value=f"{rets[ticker]:.0%}")
-        colC.metric(label="Volatility", value=f"{vols[ticker]:.0%}")
-        style_metric_cards(background_color='rgba(255,255,255,0)')
+            colB.metric(label="Return", value=f"{rets[ticker]:.0%}")
+            colC.metric(label="Volatility", value=f"{vols[ticker]:.0%}")
+            style_metric_cards(background_color='rgba(255,255,255,0)')
 
     col1, col2 = st.columns(2, gap='large')
     with col1:
         st.subheader("Relative Performance")
-        st.line_chart(norm_prices, height=600)
+        visible = zoom_slider(prices.index)
+        with profiler.stage("chart", "performance"):
+            perf_chart = st.line_chart(downsample.downsample(norm_prices[visible]), height=600)
+
+        st.subheader("Rolling Risk vs IBOV")
+        window = st.selectbox("Window (trading days)", [21, 63, 126, 252], index=1)
+        with profiler.stage("compute", "rolling"):
+            r = panel.returns
+            rolling = get_rolling(columns, prices.index[1:], r, r[:, len(tickers)], window)
+        tabs = st.tabs(["Volatility", "Sharpe", "Beta", "Correlation"])
+        for tab, metric in zip(tabs, ["volatility", "sharpe", "beta", "correlation"]):
+            with tab, profiler.stage("chart", metric):
+                frame = pd.DataFrame(rolling[metric], index=prices.index[1:], columns=columns)
+                st.line_chart(downsample.downsample(frame[visible[1:]]), height=300)
 
     with col2:
+        import plotly.express as px
+
         st.subheader("Risk-Return")
+        optimize = st.toggle("Efficient frontier", value=False)
+        if optimize:
+            rets = pd.Series(stats["annual_return"], index=columns)
         fig = px.scatter(
             x=vols,
             y=rets,
             text=vols.index,
-            color=rets / vols,
+            color=sharpe,
             color_continuous_scale=px.colors.sequential.Bluered_r
         )
         fig.update_traces(
@@ -117,10 +229,233 @@ def build_main(tickers, prices):
         fig.layout.xaxis.tickformat = ".0%"
         fig.layout.yaxis.tickformat = ".0%"
         fig.layout.coloraxis.colorbar.title = 'Sharpe'
+
+        if optimize:
+            with profiler.stage("compute", "frontier"):
+                frontier = get_frontier(prices.iloc[:, :-1])
+            fig.layout.yaxis.title = 'Annualized Return'
+            fig.add_scatter(x=frontier["volatility"], y=frontier["return"], mode="lines",
+                            name="Efficient Frontier", line=dict(color="black", width=3))
+            picks = {"Min Variance": frontier["min_variance"], "Max Sharpe": frontier["max_sharpe"]}
+            fig.add_scatter(x=frontier["volatility"][list(picks.values())], y=frontier["return"][list(picks.values())],
+                            mode="markers+text", text=list(picks), textposition="top center",
+                            marker=dict(size=18, symbol="star", color="gold"), name="Optimal")
+        with profiler.stage("chart", "risk-return"):
+            st.plotly_chart(fig, use_container_width=True)
+
+        if optimize:
+            optimal = pd.DataFrame({name: frontier["weights"][i] for name, i in picks.items()},
+                                   index=prices.columns[:-1])
+            st.dataframe(optimal.style.format("{:.1%}"), use_container_width=True)
+
+    build_backtest(tickers, prices)
+
+    return perf_chart
+
+def build_backtest(tickers, prices):
+    st.subheader("Backtest vs IBOV")
+    col1, col2 = st.columns([1, 3], gap='large')
+    with col1:
+        schedules = st.multiselect("Rebalance", list(backtest.SCHEDULES), default=["Buy & hold", "Monthly"])
+        cost = st.number_input("Transaction cost (bps)", min_value=0.0, max_value=200.0, value=10.0, step=5.0) / 1e4
+        n_random = st.number_input("Random weightings to sweep", min_value=0, max_value=5000, value=0, step=500)
+        targets = st.data_editor(pd.DataFrame({"Weight (%)": 100 / len(tickers)}, index=tickers),
+                                 use_container_width=True)
+    weights = np.clip(targets["Weight (%)"].fillna(0).to_numpy(dtype=np.float64), 0, None)
+    if not schedules or weights.sum() == 0:
+        col2.info("Escolha ao menos uma frequência de rebalanceamento e um peso positivo.")
+        return
+
+    with profiler.stage("compute", "backtest"):
+        # Target weights first, then the random sweep; the sweep only keeps metrics, and paths are
+        # recomputed for the target and the best Sharpe of each schedule
+        assets = analytics.as_array(prices.iloc[:, :-1])
+        ibov = analytics.as_array(prices.iloc[:, -1:])
+        candidates = np.vstack([weights / weights.sum(), backtest.random_weights(n_random, len(tickers))])
+        sharpe = backtest.score(assets, prices.index, candidates, schedules, ibov[:, 0], cost)["sharpe"]
+
+        paths, labels = [], []
+        # An asset without prices in the window leaves every path NaN, and nothing to rank
+        ranked = n_random and np.isfinite(sharpe[:, 1:]).any(axis=1).all()
+        if n_random and not ranked:
+            col2.warning("Algum ativo não tem preços no período; a busca aleatória foi ignorada.")
+        for k, schedule in enumerate(schedules):
+            picks = [0]
+            labels.append(f"Target ({schedule})")
+            if ranked:
+                picks.append(1 + np.nanargmax(sharpe[k, 1:]))
+                labels.append(f"Best of {n_random} ({schedule})")
+            mask = backtest.rebalance_dates(prices.index, backtest.SCHEDULES[schedule])
+            paths.append(backtest.backtest(assets, candidates[picks], mask, cost))
+        series = np.column_stack(paths + [ibov])
+        labels.append("^BVSP")
+        stats = analytics.metrics(series, ibov[:, 0])
+
+    with col2, profiler.stage("chart", "backtest"):
+        frame = pd.DataFrame(analytics.normalize(series), index=prices.index, columns=labels)
+        st.line_chart(downsample.downsample(frame), height=450)
+        table = pd.DataFrame({
+            "Return": stats["return"],
+            "Annual Return": stats["annual_return"],
+            "Volatility": stats["volatility"],
+            "Sharpe": stats["sharpe"],
+            "Max Drawdown": stats["max_drawdown"],
+            "Beta": stats["beta"],
+        }, index=labels)
+        st.dataframe(table.style.format("{:.1%}").format("{:.2f}", subset=["Sharpe", "Beta"]),
+                     use_container_width=True)
+
+def stream_live(tickers, panel, chart):
+    # Keeps this script run alive, pushing only the new bars to the chart; any interaction reruns the page.
+    # Streamlit only acts on reruns and stops when the script calls st.*, so the wait between polls is
+    # sliced into seconds that each redraw the status line
+    live = LivePanel(panel.frame, panel.weights)
+    feed = os.environ.get("LIVE_FEED")
+    source = FileFeed(feed) if feed else yf_poll
+    status = st.sidebar.empty()
+    notice = (status.caption, "Aguardando novas barras...")
+    # A local feed replays at any hour; yfinance has nothing new outside the B3 session
+    while feed or market_open(time.time()):
+        try:
+            delta = live.append(source(panel.columns, live.updated))
+        except Exception as e:
+            notice = (status.warning, f"Erro ao atualizar preços: {str(e)}")
+            delta = None
+        if delta is not None:
+            chart.add_rows(delta)
+            notice = (status.caption, f"Última barra: {live.updated:%d/%m %H:%M}")
+        deadline = time.monotonic() + st.session_state["live_interval"]
+        while time.monotonic() < deadline:
+            notice[0](notice[1])
+            time.sleep(min(1.0, max(0.0, deadline - time.monotonic())))
+    status.caption("Fora do horário de pregão: modo ao vivo pausado.")
+
+def build_correlation(tickers):
+    col1, col2, col3 = st.columns(3)
+    scope = col1.radio("Universe", ["Selected", "All tickers"], horizontal=True)
+    lookback = col2.selectbox("Window (trading days)", ["Full range", 21, 63, 126, 252], index=4, key="corr_window")
+    matrix = col3.radio("Matrix", ["Correlation", "Covariance"], horizontal=True)
+
+    if scope == "Selected":
+        if not tickers:
+            st.info("Selecione empresas na barra lateral ou use o universo completo.")
+            return
+        universe = tuple(tickers + ["^BVSP"])
+    else:
+        universe = tuple(t + ".SA" for t in get_tickers()) + ("^BVSP",)
+
+    with st.spinner("Carregando preços..."), profiler.stage("fetch", "universe"):
+        panel = get_panel(universe, st.session_state["start_date"], st.session_state["end_date"])
+    if len(panel.index) < 3:
+        st.warning("Histórico insuficiente para o período selecionado.")
+        return
+
+    with profiler.stage("compute", "comoments"):
+        window = None if lookback == "Full range" else lookback
+        # Panel returns hold the portfolio last; the matrix covers the assets and ^BVSP
+        moments = get_comoments(universe, window, st.session_state["start_date"]).update(
+            panel.index[1:], panel.returns[:, :-1])
+        merges, order = correlation.linkage(moments["correlation"])
+
+    cluster = st.toggle("Order by hierarchical clustering", value=True)
+    labels = np.array([t.replace(".SA", "") for t in universe])
+    order = order if cluster else np.arange(len(universe))
+    values = moments[matrix.lower()][np.ix_(order, order)]
+
+    with profiler.stage("chart", "heatmap"):
+        import plotly.express as px
+
+        fig = px.imshow(values, x=labels[order], y=labels[order], zmin=-1 if matrix == "Correlation" else None,
+                        zmax=1 if matrix == "Correlation" else None, color_continuous_scale="RdBu_r", aspect="auto")
+        fig.layout.height = 400 + 8 * len(universe)
         st.plotly_chart(fig, use_container_width=True)
 
-with st.sidebar:
-    tickers, prices = build_sidebar()
+    if cluster and len(universe) > 2:
+        # st.slider needs min < max; with three assets two clusters is the only split
+        top = min(len(universe) - 1, 20)
+        k = st.slider("Clusters", 2, top, min(4, top)) if top > 2 else 2
+        groups = correlation.cut(merges, len(universe), k)
+        st.dataframe(pd.DataFrame({"Cluster": groups + 1}, index=labels).sort_values("Cluster").T,
+                     use_container_width=True)
+
+def build_screener():
+    screener = get_screener()
+    universe = get_tickers()
+    screener.ensure_fresh(universe)
+
+    frame = screener.load()
+    age = screener.age()
+    col1, col2 = st.columns([4, 1])
+    with col2:
+        if st.button("Refresh snapshot", disabled=screener.refreshing):
+            screener.refresh_async(universe)
+    with col1:
+        if screener.refreshing:
+            st.info("Atualizando snapshot de fundamentos em segundo plano...")
+        elif age is not None:
+            st.caption(f"Snapshot de {len(frame)} empresas, atualizado há {age / 3600:.1f}h")
+        if screener.error:
+            st.error(f"Erro ao atualizar snapshot: {str(screener.error)}")
+
+    if frame is None:
+        return
+
+    sectors = st.multiselect("Setor", sorted(frame["Setor"].dropna().unique()), placeholder="Todos")
+    ranges = {}
+    filter_cols = st.columns(5)
+    for col, name in zip(filter_cols, ["P/L", "P/VP", "Dividend Yield", "ROE", "Margem Líq."]):
+        values = frame[name].dropna()
+        low, high = (float(values.min()), float(values.max())) if not values.empty else (0.0, 0.0)
+        if low == high:
+            continue
+        selected = col.slider(name, low, high, (low, high))
+        if selected != (low, high):
+            ranges[name] = selected
+
+    numeric = [c for c in frame.columns if c not in ["Ticker", "Nome", "Setor"]]
+    sort_col, order_col = st.columns([3, 1])
+    sort_by = sort_col.selectbox("Ordenar por", numeric, index=numeric.index("Valor Mercado"))
+    ascending = order_col.radio("Ordem", ["Desc", "Asc"], horizontal=True) == "Asc"
+
+    with profiler.stage("compute", "screen"):
+        result = screen(frame, ranges, sectors, sort_by, ascending)
+    st.caption(f"{len(result)} empresas")
+    formats = {c: "{:.2f}" for c in numeric}
+    formats.update({c: "{:.1f}%" for c in PERCENT + ["Potencial"]})
+    formats["Valor Mercado"] = "{:,.0f}"
+    with profiler.stage("format", "screen"):
+        st.dataframe(result.set_index("Ticker").style.format(formats, na_rep="-"), use_container_width=True, height=600)
+
+profiler.start_run("itau")
+# Closed even when st.stop() or an error ends the run early
+try:
+    debug_panel()
+
+    st.title("Investment Analysis")
+
+    st.sidebar.image("itau.svg", use_column_width=True)
+
+    if os.environ.get("PREFETCH", "1") == "1" and not service:
+        get_scheduler()
+
+    with st.sidebar:
+        tickers, panel = build_sidebar()
+
+    tab_portfolio, tab_screener, tab_correlation = st.tabs(["Portfolio", "Screener", "Correlation"])
+
+    with tab_portfolio:
+        if tickers:
+            perf_chart = build_main(tickers, panel)
+
+    with tab_screener:
+        build_screener()
+
+    with tab_correlation:
+        build_correlation(tickers)
+finally:
+    profiler.end_run()
 
-if tickers:
-    build_main(tickers, prices)
+# The live loop runs after the run is recorded, so its timings are not held open
+if tickers and st.session_state["live"]:
+    with tab_portfolio:
+        stream_live(tickers, panel, perf_chart)
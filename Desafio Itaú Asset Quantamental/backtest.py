@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+import analytics
+
+# Label -> pandas period of each rebalance; None holds the initial shares
+SCHEDULES = {"Buy & hold": None, "Monthly": "M", "Quarterly": "Q"}
+
+
+def rebalance_dates(index, freq):
+    """Boolean mask over `index`: the first date plus the first trading day of every new period."""
+    mask = np.zeros(len(index), dtype=bool)
+    if len(index):
+        mask[0] = True
+    if freq is not None and len(index) > 1:
+        periods = pd.DatetimeIndex(index).to_period(freq).asi8
+        mask[1:] = periods[1:] != periods[:-1]
+    return mask
+
+
+def backtest(prices, weights, mask, cost=0.0, chunk=1024):
+    """Values of constant-mix portfolios rebalanced to `weights` on the dates in `mask`.
+
+    `prices` is a (dates x assets) block of adjusted closes, so dividends are
+    reinvested; `weights` is (portfolios x assets) with rows summing to one.
+    Between rebalances each portfolio holds fixed shares, so the whole path is
+    one (dates x assets) @ (assets x portfolios) product per schedule. `cost` is
+    the fraction of traded value (buys plus sells, and the initial purchase)
+    lost at each rebalance.
+    Returns (dates x portfolios) values starting at 1 - cost; dates before every
+    asset has a price are NaN.
+    """
+    prices = analytics.as_array(prices)
+    weights = np.atleast_2d(weights)
+    values = np.full((len(prices), len(weights)), np.nan)
+    start = np.argmax(np.isfinite(prices).all(axis=1)) if len(prices) else 0
+    if not len(prices) or not np.isfinite(prices[start]).all():
+        return values
+    prices = prices[start:]
+    mask = mask[start:].copy()
+    mask[0] = True
+
+    starts = np.flatnonzero(mask)
+    segment = np.cumsum(mask) - 1
+    growth = (prices / prices[starts][segment]) @ weights.T
+
+    # Drift of each asset over the segment that ends at every rebalance
+    drift = prices[starts[1:]] / prices[starts[:-1]]
+    held = drift @ weights.T
+    turnover = np.empty_like(held)
+    for i in range(0, len(weights), chunk):
+        # Traded fraction: sum_i w_i |1 - drift_i / held| for every (rebalance, portfolio)
+        ratio = drift[:, None, :] / held[:, i:i + chunk, None]
+        turnover[:, i:i + chunk] = (weights[None, i:i + chunk] * np.abs(1 - ratio)).sum(axis=2)
+    carry = np.vstack([np.full((1, len(weights)), 1 - cost), held * (1 - cost * turnover)])
+
+    values[start:] = np.cumprod(carry, axis=0)[segment] * growth
+    return values
+
+
+def score(prices, index, weights, schedules, benchmark, cost=0.0, chunk=256):
+    """analytics.metrics of every weighting in `weights` under every schedule label.
+
+    Portfolios are backtested `chunk` at a time and only their metrics are
+    kept, so memory stays at a few (dates x chunk) blocks however large the
+    sweep. Each metric is a (schedules x portfolios) array; rerun `backtest`
+    on the few weightings whose paths are needed.
+    """
+    prices = analytics.as_array(prices)
+    weights = np.atleast_2d(weights)
+    rows = []
+    for s in schedules:
+        mask = rebalance_dates(index, SCHEDULES[s])
+        parts = [analytics.metrics(backtest(prices, weights[i:i + chunk], mask, cost), benchmark)
+                 for i in range(0, len(weights), chunk)]
+        rows.append({k: np.concatenate([part[k] for part in parts]) for k in parts[0]})
+    return {k: np.vstack([row[k] for row in rows]) for k in rows[0]}
+
+
+def random_weights(n_portfolios, n_assets, seed=0):
+    # Uniform over the simplex
+    return np.random.default_rng(seed).dirichlet(np.ones(n_assets), n_portfolios)
@@ -0,0 +1,50 @@
+"""Precompiles tickers.csv into tickers.json with each company's name, sector and logo.
+
+    python build_tickers.py
+
+Names and sectors come from the screener snapshot (fundamentals.parquet) when
+there is one, from yfinance otherwise; logos are fetched into the logo cache.
+Run it whenever tickers.csv changes, e.g. as a step of the image build. The
+app reads tickers.json at startup and falls back to tickers.csv without it.
+"""
+import json
+import os
+
+from logos import LogoCache, read_codes
+from screener import Screener, build_snapshot
+
+TICKERS_JSON = "tickers.json"
+
+
+def build(codes, snapshot, logos):
+    # Missing text fields are NaN in the snapshot; keep them as null
+    names = {t: n for t, n in zip(snapshot["Ticker"], snapshot["Nome"]) if isinstance(n, str)}
+    sectors = {t: s for t, s in zip(snapshot["Ticker"], snapshot["Setor"]) if isinstance(s, str)}
+    return [
+        {
+            "code": code,
+            "name": names.get(code),
+            "sector": sectors.get(code),
+            "logo": logos.path(code) if logos.path(code) != logos.placeholder else None,
+        }
+        for code in codes
+    ]
+
+
+def main():
+    codes = read_codes()
+    snapshot = Screener().load()
+    if snapshot is None:
+        snapshot = build_snapshot(codes)
+    logos = LogoCache()
+    logos.prefetch(codes)
+
+    tickers = build(codes, snapshot, logos)
+    with open(TICKERS_JSON + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(tickers, f, ensure_ascii=False, indent=0)
+    os.replace(TICKERS_JSON + ".tmp", TICKERS_JSON)
+    print(f"{len(tickers)} tickers written to {TICKERS_JSON}")
+
+
+if __name__ == "__main__":
+    main()
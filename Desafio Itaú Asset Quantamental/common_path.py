@@ -0,0 +1,7 @@
+import os
+import sys
+
+# data_cache, profiling, downsample and service_client live in ../common, shared by both apps
+COMMON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "common")
+if COMMON_DIR not in sys.path:
+    sys.path.insert(0, COMMON_DIR)
@@ -0,0 +1,93 @@
+import numpy as np
+
+from analytics import TRADING_DAYS
+
+
+class CoMoments:
+    """Pairwise-complete covariance and correlation over the trailing `window` dates (all dates if None).
+
+    Keeps the sums n, Σx, Σx² and Σxy of every pair as (assets x assets)
+    matrices, each one matrix product over the rows. New dates are added and
+    dates leaving the window subtracted, so a new day costs one row update
+    instead of the full matrix.
+    """
+
+    def __init__(self, window=None):
+        self.window = window
+        self.index = []
+        self._sums = None
+
+    def _add(self, r, sign=1.0):
+        r = np.asarray(r, dtype=np.float64)
+        valid = np.isfinite(r)
+        v = valid.astype(np.float64)
+        x = np.where(valid, r, 0.0)
+        # [i, j] entries: pairs observed, Σx_i, Σx_i² over dates where j is valid too, and Σx_i x_j
+        self._sums += sign * np.stack([v.T @ v, x.T @ v, (x * x).T @ v, x.T @ x])
+
+    def _start(self, rows):
+        return max(0, rows - self.window) if self.window else 0
+
+    def update(self, index, r):
+        # r is (dates x assets) returns on `index`; only dates not seen before are processed
+        index = list(index)
+        seen = len(self.index)
+        if self._sums is None or index[:seen] != self.index or r.shape[1] != self._sums.shape[1]:
+            self.index, seen = [], 0
+            self._sums = np.zeros((4, r.shape[1], r.shape[1]))
+        if len(index) > seen:
+            old, new = self._start(seen), self._start(len(index))
+            self._add(r[max(seen, new):])
+            if min(new, seen) > old:
+                self._add(r[old:min(new, seen)], -1.0)
+            self.index = index
+        return self.matrices()
+
+    def matrices(self):
+        n, sx, sxx, sxy = self._sums
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = (sxy - sx * sx.T / n) / (n - 1)
+            var = (sxx - sx * sx / n) / (n - 1)
+            corr = cov / np.sqrt(var * var.T)
+        return {"covariance": cov * TRADING_DAYS, "correlation": np.clip(corr, -1, 1), "observations": n}
+
+
+def linkage(corr):
+    """Average-linkage clustering on the distance sqrt((1 - corr) / 2).
+
+    Returns the merges as rows of (cluster a, cluster b, distance, size) with
+    new clusters numbered from len(corr), like scipy's linkage, and the leaf
+    order that puts every cluster's members next to each other.
+    """
+    n = len(corr)
+    d = np.sqrt(np.clip((1 - np.nan_to_num(corr)) / 2, 0, 1))
+    np.fill_diagonal(d, np.inf)
+    sizes = np.ones(n)
+    ids = np.arange(n)
+    leaves = [[i] for i in range(n)]
+    active = np.ones(n, dtype=bool)
+    merges = np.empty((max(n - 1, 0), 4))
+    for k in range(n - 1):
+        i, j = np.unravel_index(np.argmin(d), d.shape)
+        i, j = min(i, j), max(i, j)
+        merges[k] = ids[i], ids[j], d[i, j], sizes[i] + sizes[j]
+        # Lance-Williams update for average linkage; j's row and column drop out
+        d[i] = (sizes[i] * d[i] + sizes[j] * d[j]) / (sizes[i] + sizes[j])
+        d[:, i] = d[i]
+        d[i, i] = np.inf
+        d[j], d[:, j] = np.inf, np.inf
+        active[j] = False
+        sizes[i] += sizes[j]
+        ids[i] = n + k
+        leaves[i] = leaves[i] + leaves[j]
+    order = np.array(leaves[np.flatnonzero(active)[0]]) if n else np.arange(0)
+    return merges, order
+
+
+def cut(merges, n, k):
+    """Cluster label of each of the `n` leaves after stopping at `k` clusters."""
+    labels = np.arange(n)
+    for step, (a, b, _, _) in enumerate(merges[:n - k]):
+        labels[(labels == a) | (labels == b)] = n + step
+    _, compact = np.unique(labels, return_inverse=True)
+    return compact
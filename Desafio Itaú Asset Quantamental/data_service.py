@@ -0,0 +1,256 @@
+"""Local data service that owns every upstream (yfinance) call for both apps.
+
+    python data_service.py --port 8765 --prefetch
+    DATA_SERVICE_URL=http://127.0.0.1:8765 streamlit run app.py
+
+Concurrent identical requests share one upstream call (single-flight), upstream
+calls are rate-limited and bounded in concurrency, and results land in the
+shared price store and data cache. Frames are served as Arrow IPC streams and
+`info` as JSON; see service_client.py for the client side.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+import price_store
+import common_path  # noqa: F401 - puts ../common on sys.path
+from data_cache import cache
+from price_store import PriceStore
+from service_client import to_arrow
+
+HOST = "127.0.0.1"
+PORT = 8765
+RATE = float(os.environ.get("UPSTREAM_RATE", 2))
+BURST = 5
+MAX_UPSTREAM = 4
+STATEMENTS = ["financials", "balance_sheet", "cashflow"]
+
+
+class SingleFlight:
+    """Runs one call per key at a time; callers arriving meanwhile wait for and share its result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.shared = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event()}
+            else:
+                self.shared += 1
+        if not leader:
+            call["done"].wait()
+        else:
+            try:
+                call["value"] = fn()
+            except Exception as e:
+                call["error"] = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call["done"].set()
+        if "error" in call:
+            raise call["error"]
+        return call["value"]
+
+    def inflight(self):
+        return len(self._calls)
+
+
+class RateLimiter:
+    """Token bucket: `rate` calls per second on average, bursts of up to `burst`."""
+
+    def __init__(self, rate=RATE, burst=BURST, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self.sleep(wait)
+
+
+class DataService:
+    """Upstream access shared by every client: cache first, then one limited upstream call per key."""
+
+    def __init__(self, store=None, limiter=None, max_upstream=MAX_UPSTREAM):
+        self.limiter = limiter or RateLimiter()
+        self.flights = SingleFlight()
+        self.calls = Counter()
+        self._slots = threading.BoundedSemaphore(max_upstream)
+        self.store = store or PriceStore(fetch=self._limited("prices", price_store.yf_fetch))
+
+    def _limited(self, name, fn):
+        def call(*args, **kwargs):
+            with self._slots:
+                self.limiter.acquire()
+                self.calls[name] += 1
+                return fn(*args, **kwargs)
+
+        return call
+
+    def prices(self, tickers, start, end):
+        return self.flights.do(("prices", tuple(tickers), start, end),
+                               lambda: self.store.get(tickers, start, end))
+
+    def version(self, tickers):
+        return self.store.version(tickers)
+
+    def info(self, ticker):
+        import yfinance as yf
+
+        load = self._limited("info", lambda: yf.Ticker(ticker).info)
+        return self.flights.do(("info", ticker), lambda: cache.get(ticker, "info", load))
+
+    def history(self, ticker, period):
+        import yfinance as yf
+
+        load = self._limited("history", lambda: yf.Ticker(ticker).history(period=period))
+        return self.flights.do(("history", ticker, period), lambda: cache.get(ticker, f"history:{period}", load))
+
+    def statement(self, ticker, name):
+        import yfinance as yf
+
+        if name not in STATEMENTS:
+            raise KeyError(name)
+        load = self._limited(name, lambda: getattr(yf.Ticker(ticker), name))
+        return self.flights.do((name, ticker), lambda: cache.get(ticker, name, load))
+
+    def histories(self, tickers, period):
+        # Cached tickers are served as is; the rest share one batched download
+        return self.flights.do(("histories", tuple(tickers), period), lambda: self._histories(tickers, period))
+
+    def _histories(self, tickers, period):
+        import yfinance as yf
+
+        dataset = f"history:{period}"
+        histories, missing = {}, []
+        for ticker in tickers:
+            found, hist = cache.lookup(ticker, dataset)
+            if found:
+                histories[ticker] = hist
+            else:
+                missing.append(ticker)
+        if missing:
+            cache.miss(len(missing))
+            download = self._limited("download", yf.download)
+            data = download(missing, period=period, group_by="ticker", auto_adjust=True, progress=False)
+            cache.loaded(data)
+            if not isinstance(data.columns, pd.MultiIndex):
+                fetched = {missing[0]: data.dropna(how="all")}
+            else:
+                available = set(data.columns.get_level_values(0))
+                fetched = {t: data[t].dropna(how="all") for t in missing if t in available}
+            for ticker, hist in fetched.items():
+                cache.put(ticker, dataset, hist)
+            histories.update(fetched)
+        if not histories:
+            return pd.DataFrame()
+        return pd.concat({t: histories[t] for t in tickers if t in histories}, axis=1)
+
+    def stats(self):
+        return {"upstream": dict(self.calls), "shared": self.flights.shared,
+                "inflight": self.flights.inflight(), **cache.stats()}
+
+
+def handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status, body, content_type):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json(self, status, value):
+            self._send(status, json.dumps(value, default=str).encode(), "application/json")
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            q = {k: v[0] for k, v in parse_qs(url.query).items()}
+            try:
+                if url.path == "/prices":
+                    body = service.prices(q["tickers"].split(","), q["start"], q["end"])
+                elif url.path == "/info":
+                    return self._json(200, service.info(q["ticker"]))
+                elif url.path == "/history":
+                    body = service.history(q["ticker"], q.get("period", "1y"))
+                elif url.path == "/histories":
+                    body = service.histories(q["tickers"].split(","), q.get("period", "1y"))
+                elif url.path == "/statement":
+                    body = service.statement(q["ticker"], q["name"])
+                elif url.path == "/version":
+                    return self._json(200, {"version": service.version(q["tickers"].split(","))})
+                elif url.path == "/stats":
+                    return self._json(200, service.stats())
+                else:
+                    return self._json(404, {"error": f"unknown path {url.path}"})
+            except KeyError as e:
+                return self._json(400, {"error": f"bad parameter {e}"})
+            except Exception as e:
+                return self._json(502, {"error": str(e)})
+            self._send(200, to_arrow(body), "application/vnd.apache.arrow.stream")
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(host=HOST, port=PORT, service=None):
+    """Starts the HTTP server on a daemon thread and returns it; `server.server_address` has the bound port."""
+    server = ThreadingHTTPServer((host, port), handler(service or DataService()))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--prefetch", action="store_true", help="also keep the watchlist warm in this process")
+    args = parser.parse_args()
+
+    service = DataService()
+    server = serve(args.host, args.port, service)
+    print(f"serving on http://{args.host}:{server.server_address[1]}", flush=True)
+    if args.prefetch:
+        from prefetch import Scheduler, yf_fetch
+
+        # Prices already go through the store's limited fetch; only the other datasets need a slot here.
+        # Both apps read this process's cache, so the CFA fundamentals are worth keeping warm too
+        fetch = yf_fetch(service.store)
+        limited = service._limited("prefetch", fetch)
+        Scheduler(fetch=lambda t, d: fetch(t, d) if d == "prices" else limited(t, d), shared=True).run_forever()
+    else:
+        threading.Event().wait()
+
+
+if __name__ == "__main__":
+    main()
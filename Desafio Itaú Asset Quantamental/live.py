@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import analytics
+
+INTERVAL = 60
+
+
+def yf_poll(tickers, since):
+    # Intraday 1-minute closes after `since`; only the new bars travel over the wire.
+    # Naive times are exchange-local on both sides, and the first poll of a session starts at midnight
+    import yfinance as yf
+
+    start = max(pd.Timestamp(since), pd.Timestamp.today().normalize())
+    data = yf.download(tickers, start=start, interval="1m", auto_adjust=False, progress=False)["Close"]
+    if isinstance(data, pd.Series):
+        data = data.to_frame(tickers[0])
+    if data.index.tz is not None:
+        data.index = data.index.tz_localize(None)
+    return data[data.index > since]
+
+
+class FileFeed:
+    """Local feed of appended `timestamp,ticker,price` lines, read from where the last poll stopped."""
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+
+    def __call__(self, tickers, since):
+        if not os.path.exists(self.path):
+            return pd.DataFrame(columns=tickers, index=pd.DatetimeIndex([]))
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read()
+        # A last line without its newline is still being written: leave it for the next poll
+        complete = data.rfind(b"\n") + 1
+        self.offset += complete
+        lines = data[:complete].decode().splitlines()
+        rows = [line.strip().split(",") for line in lines if line.count(",") == 2]
+        if not rows:
+            return pd.DataFrame(columns=tickers, index=pd.DatetimeIndex([]))
+        bars = pd.DataFrame(rows, columns=["timestamp", "ticker", "price"])
+        bars["timestamp"] = pd.to_datetime(bars["timestamp"])
+        bars["price"] = pd.to_numeric(bars["price"])
+        bars = bars.pivot_table(index="timestamp", columns="ticker", values="price", aggfunc="last")
+        bars = bars.reindex(columns=tickers)
+        return bars[bars.index > since]
+
+
+class LivePanel:
+    """Price panel that grows bar by bar.
+
+    Columns are the assets followed by the benchmark, as in build_main. Each
+    append only computes the new rows of the portfolio and the normalized
+    prices, and hands the latter back as the delta for the Relative
+    Performance chart's `add_rows`. The rolling charts work on daily
+    returns, so minute bars are not pushed to them.
+    """
+
+    def __init__(self, prices, weights):
+        self.columns = list(prices.columns) + ["portfolio"]
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.updated = prices.index[-1]
+        series = self._with_portfolio(analytics.as_array(prices))
+        self.last = series[-1]
+        # Same per-column base as analytics.normalize, so deltas line up with the initial chart
+        self.base = series[np.argmax(np.isfinite(series), axis=0), np.arange(series.shape[1])]
+
+    def _with_portfolio(self, values):
+        return np.column_stack([values, values[:, :-1] @ self.weights])
+
+    def append(self, bars):
+        # bars: new rows indexed by timestamp, any subset of the price columns
+        bars = bars[bars.index > self.updated].sort_index()
+        if bars.empty:
+            return None
+        raw = bars.reindex(columns=self.columns[:-1]).to_numpy(dtype=np.float64)
+        raw = np.vstack([self.last[:-1], raw])
+        raw = pd.DataFrame(raw).ffill().to_numpy()[1:]
+
+        values = self._with_portfolio(raw)
+        self.last = values[-1]
+        self.updated = bars.index[-1]
+        return pd.DataFrame(100 * values / self.base, index=bars.index, columns=self.columns)
@@ -0,0 +1,99 @@
+"""Company logos downsized once and served from disk.
+
+    python logos.py            # fetch every ticker in tickers.csv
+
+The app starts the same prefetch in the background for whatever is missing;
+until a logo is on disk its card shows the placeholder.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+LOGO_DIR = os.environ.get("LOGO_DIR", ".logos")
+SOURCE = "https://raw.githubusercontent.com/thefintz/icones-b3/main/icones/{code}.png"
+LOCAL = {"^BVSP": "bov.png"}
+PLACEHOLDER = "B3.png"
+SIZE = 128
+MAX_WORKERS = 16
+TIMEOUT = 10
+
+
+def read_codes(path="tickers.csv"):
+    codes = pd.read_csv(path, header=None).iloc[:, 1].astype(str)
+    return [c for c in codes if c != '0']
+
+
+def downsize(source, target, size=SIZE):
+    from PIL import Image
+
+    with Image.open(source) as image:
+        image.thumbnail((size, size))
+        image.save(target + ".tmp", format="PNG", optimize=True)
+    os.replace(target + ".tmp", target)
+
+
+class LogoCache:
+    """One small PNG per B3 code under `root`, fetched in bulk from the icones-b3 repository."""
+
+    def __init__(self, root=LOGO_DIR, source=SOURCE, max_workers=MAX_WORKERS):
+        self.root = root
+        self.source = source
+        self.max_workers = max_workers
+        self.refreshing = False
+        self.placeholder = os.path.join(root, "_placeholder.png")
+        os.makedirs(root, exist_ok=True)
+        # Bundled images only need downsizing, so they are ready before any download
+        for code, image in [("_placeholder", PLACEHOLDER)] + list(LOCAL.items()):
+            if not os.path.exists(self._path(code)):
+                downsize(image, self._path(code))
+
+    def _path(self, code):
+        return os.path.join(self.root, f"{code}.png")
+
+    def path(self, code):
+        # Never touches the network: a logo not fetched yet falls back to the placeholder
+        path = self._path(code)
+        return path if os.path.exists(path) else self.placeholder
+
+    def _fetch(self, session, code):
+        from io import BytesIO
+
+        response = session.get(self.source.format(code=code), timeout=TIMEOUT)
+        response.raise_for_status()
+        downsize(BytesIO(response.content), self._path(code))
+
+    def prefetch(self, codes):
+        """Downloads and downsizes every missing logo; returns the codes that failed."""
+        import requests
+
+        missing = [c for c in codes if not os.path.exists(self._path(c))]
+        failed = []
+        with requests.Session() as session, ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {code: pool.submit(self._fetch, session, code) for code in missing}
+            for code, future in futures.items():
+                try:
+                    future.result()
+                except Exception:
+                    failed.append(code)
+        return failed
+
+    def prefetch_async(self, codes):
+        if self.refreshing:
+            return
+        self.refreshing = True
+
+        def run():
+            try:
+                self.prefetch(codes)
+            finally:
+                self.refreshing = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+
+if __name__ == "__main__":
+    codes = read_codes()
+    failed = LogoCache().prefetch(codes)
+    print(f"{len(codes) - len(failed)} logos in {LOGO_DIR}, {len(failed)} unavailable")
@@ -0,0 +1,60 @@
+import numpy as np
+
+from analytics import TRADING_DAYS, returns
+
+ITERATIONS = 500
+
+
+def moments(prices):
+    # Annualized mean returns and covariance of a (dates x assets) price block
+    r = np.nan_to_num(returns(prices))
+    mu = r.mean(axis=0) * TRADING_DAYS
+    cov = np.atleast_2d(np.cov(r, rowvar=False)) * TRADING_DAYS
+    return mu, cov
+
+
+def project_simplex(v):
+    # Row-wise Euclidean projection onto {w >= 0, sum(w) = 1}
+    u = -np.sort(-v, axis=1)
+    css = np.cumsum(u, axis=1) - 1
+    k = np.arange(1, v.shape[1] + 1)
+    rho = (u - css / k > 0).sum(axis=1) - 1
+    theta = css[np.arange(len(v)), rho] / (rho + 1)
+    return np.maximum(v - theta[:, None], 0)
+
+
+def solve(mu, cov, risk_tolerance):
+    """Long-only weights minimizing w'Σw - λ·w'μ for every λ in `risk_tolerance`.
+
+    All problems are solved together with accelerated projected gradient, so
+    the whole frontier costs a few hundred (λ x assets) @ (assets x assets) products.
+    """
+    lam = np.asarray(risk_tolerance, dtype=np.float64)[:, None]
+    step = 1 / (2 * max(np.linalg.eigvalsh(cov)[-1], 1e-12))
+    w = np.full((len(lam), len(mu)), 1 / len(mu))
+    y, t = w, 1.0
+    for _ in range(ITERATIONS):
+        grad = 2 * y @ cov - lam * mu
+        w_next = project_simplex(y - step * grad)
+        t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        y = w_next + (t - 1) / t_next * (w_next - w)
+        w, t = w_next, t_next
+    return w
+
+
+def frontier(mu, cov, points=40, risk_free=0.0):
+    """Efficient frontier, with the indices of its min-variance and max-Sharpe portfolios."""
+    scale = np.trace(cov) / len(mu) / max(np.abs(mu).max(), 1e-12)
+    lam = np.concatenate([[0.0], scale * np.geomspace(1e-2, 1e3, points - 1)])
+    weights = solve(mu, cov, lam)
+    rets = weights @ mu
+    vols = np.sqrt(np.einsum("ij,jk,ik->i", weights, cov, weights))
+    sharpe = (rets - risk_free) / vols
+    best = np.nanargmax(sharpe)
+    return {
+        "weights": weights,
+        "return": rets,
+        "volatility": vols,
+        "min_variance": 0,
+        "max_sharpe": best,
+    }
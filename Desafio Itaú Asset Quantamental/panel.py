@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import time
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+import analytics
+from price_store import STORE_DIR
+
+PANEL_DIR = os.path.join(STORE_DIR, "panels")
+DTYPE = os.environ.get("PANEL_DTYPE", "float32")
+MAX_BYTES = int(os.environ.get("PANEL_MAX_MB", "512")) * 2**20
+MAX_AGE = 7 * 24 * 3600
+
+
+def _readonly(a):
+    a.flags.writeable = False
+    return a
+
+
+class Panel:
+    """Read-only (dates x tickers) price block with the benchmark in the last column.
+
+    `values` is usually a memory map, so every session (and process) looking at
+    the same window shares the same pages. Derived series are computed on first
+    use, once per panel, and are read-only as well.
+    """
+
+    def __init__(self, values, index, columns):
+        self.values = values
+        self.index = index
+        self.columns = list(columns)
+
+    @property
+    def frame(self):
+        return pd.DataFrame(self.values, index=self.index, columns=self.columns, copy=False)
+
+    @cached_property
+    def weights(self):
+        return analytics.equal_weights(len(self.columns) - 1).astype(self.values.dtype)
+
+    @cached_property
+    def series(self):
+        # Assets, benchmark and the equal-weight basket as one block
+        return _readonly(np.column_stack([self.values, analytics.basket_values(self.values[:, :-1], self.weights)]))
+
+    @cached_property
+    def normalized(self):
+        return _readonly(analytics.normalize(self.series))
+
+    @cached_property
+    def returns(self):
+        return _readonly(analytics.returns(self.series))
+
+    @cached_property
+    def stats(self):
+        # Accumulate in float64 whatever the storage dtype; the temporary copy is dropped afterwards
+        series = self.series.astype(np.float64)
+        return analytics.metrics(series, series[:, -2])
+
+
+class PanelStore:
+    """Materializes windows of the price store as .npy blocks and serves them memory-mapped.
+
+    Blocks are keyed by the store's version of their tickers, so a re-adjusted
+    history gets a new block. Blocks unused for `max_age` seconds, and the least
+    recently used ones beyond `max_bytes`, are deleted before a new one is saved.
+    """
+
+    def __init__(self, store, root=PANEL_DIR, dtype=DTYPE, max_bytes=MAX_BYTES, max_age=MAX_AGE):
+        self.store = store
+        self.root = root
+        self.dtype = np.dtype(dtype)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(root, exist_ok=True)
+
+    def _key(self, tickers, start, end):
+        end = min(pd.Timestamp(end), pd.Timestamp.today().normalize())
+        raw = json.dumps([list(tickers), str(pd.Timestamp(start).date()), str(end.date()), self.dtype.name,
+                          self.store.version(tickers)])
+        return os.path.join(self.root, hashlib.sha1(raw.encode()).hexdigest()[:20])
+
+    def _save(self, path, array):
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, array)
+        os.replace(path + ".tmp", path)
+
+    def prune(self):
+        panels = []
+        for name in os.listdir(self.root):
+            if not name.endswith(".npy") or name.endswith(".dates.npy"):
+                continue
+            key = os.path.join(self.root, name[:-len(".npy")])
+            try:
+                stat = os.stat(key + ".npy")
+                panels.append((stat.st_mtime, stat.st_size + os.path.getsize(key + ".dates.npy"), key))
+            except OSError:
+                continue
+        # Most recently used first; open memory maps keep working after their files are removed
+        now, total = time.time(), 0
+        for used, size, key in sorted(panels, reverse=True):
+            total += size
+            if now - used > self.max_age or total > self.max_bytes:
+                for path in (key + ".npy", key + ".dates.npy"):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+    def get(self, tickers, start, end):
+        key = self._key(tickers, start, end)
+        if not os.path.exists(key + ".npy"):
+            frame = self.store.get(list(tickers), start, end)
+            values = analytics.as_array(frame).astype(self.dtype)
+            if frame.empty:
+                return Panel(values, frame.index, tickers)
+            # The fetch may have rewritten the tickers, so the block goes under the version that follows it
+            key = self._key(tickers, start, end)
+            if not os.path.exists(key + ".npy"):
+                self.prune()
+                self._save(key + ".dates.npy", frame.index.values.astype("datetime64[ns]"))
+                self._save(key + ".npy", values)
+
+        values = np.load(key + ".npy", mmap_mode="r")
+        index = pd.DatetimeIndex(np.load(key + ".dates.npy"))
+        # The modification time doubles as the last use for prune()
+        os.utime(key + ".npy")
+        return Panel(values, index, tickers)
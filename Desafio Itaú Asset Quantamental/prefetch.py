@@ -0,0 +1,154 @@
+import json
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import common_path  # noqa: F401 - puts ../common on sys.path
+from data_cache import cache
+from price_store import PriceStore
+
+POPULAR_PATH = os.environ.get("POPULAR_PATH", os.path.join(".prices", "popular.json"))
+BASE_WATCHLIST = {"^BVSP": ["prices"]}
+# Only reaches the CFA app through the disk tier, so it is skipped without MARKET_CACHE_DIR
+SHARED_WATCHLIST = {
+    "AAPL": ["info", "history:1y", "financials", "balance_sheet", "cashflow"],
+    "MSFT": ["info", "history:1y", "financials", "balance_sheet", "cashflow"],
+    "GOOGL": ["info", "history:1y", "financials", "balance_sheet", "cashflow"],
+}
+# B3 fundamentals only feed the daily screener snapshot, which fetches its own
+B3_DATASETS = ["prices"]
+TOP_N = 20
+MAX_WORKERS = 4
+POLL = 30
+MAX_BACKOFF = 3600
+MARKET_HOURS = (9, 19)
+MARKET_TZ = ZoneInfo("America/Sao_Paulo")
+HISTORY_YEARS = 10
+
+
+def market_open(now, hours=MARKET_HOURS):
+    # B3 hours, whatever the server's own time zone; `hours` of None means always open
+    if hours is None:
+        return True
+    moment = datetime.fromtimestamp(now, MARKET_TZ)
+    return moment.weekday() < 5 and hours[0] <= moment.hour < hours[1]
+
+
+class Popularity:
+    """Selection counts per B3 ticker, persisted so a standalone prefetcher can read them."""
+
+    def __init__(self, path=POPULAR_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return Counter(json.load(f))
+        except (FileNotFoundError, ValueError):
+            return Counter()
+
+    def record(self, tickers):
+        with self._lock:
+            counts = self._load()
+            counts.update(tickers)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "w") as f:
+                json.dump(counts, f)
+
+    def top(self, n=TOP_N):
+        return [t for t, _ in self._load().most_common(n)]
+
+
+def yf_fetch(store):
+    # Default fetcher: prices go into the price store, everything else into the data cache
+    def fetch(ticker, dataset):
+        import yfinance as yf
+
+        if dataset == "prices":
+            store.get([ticker], date.today() - timedelta(days=365 * HISTORY_YEARS), date.today())
+            return None
+        stock = yf.Ticker(ticker)
+        if dataset.startswith("history:"):
+            return stock.history(period=dataset.split(":")[1])
+        return getattr(stock, dataset)
+
+    return fetch
+
+
+class Scheduler:
+    """Keeps a watchlist warm by re-fetching each (ticker, dataset) shortly before its cache TTL expires.
+
+    Failed fetches back off exponentially. `clock` and `fetch` can be swapped for
+    fakes, and `run_pending` does one pass without any threads or sleeping.
+    """
+
+    def __init__(self, fetch=None, popularity=None, publish=cache.put, ttl=cache.ttl,
+                 max_workers=MAX_WORKERS, market_hours=MARKET_HOURS, clock=time.time, sleep=time.sleep,
+                 shared=None):
+        self.fetch = fetch or yf_fetch(PriceStore())
+        self.popularity = popularity or Popularity()
+        self.publish = publish
+        self.ttl = ttl
+        self.max_workers = max_workers
+        self.market_hours = market_hours
+        self.clock = clock
+        self.sleep = sleep
+        self.shared = bool(cache.disk_dir) if shared is None else shared
+        self.due = {}
+        self.failures = Counter()
+        self._stop = threading.Event()
+
+    def watchlist(self):
+        watchlist = {**BASE_WATCHLIST, **SHARED_WATCHLIST} if self.shared else BASE_WATCHLIST
+        tasks = [(t, d) for t, datasets in watchlist.items() for d in datasets]
+        for code in self.popularity.top():
+            tasks += [(code + ".SA", d) for d in B3_DATASETS]
+        return tasks
+
+    def in_market_hours(self, now):
+        return market_open(now, self.market_hours)
+
+    def _run(self, task):
+        ticker, dataset = task
+        value = self.fetch(ticker, dataset)
+        if value is not None:
+            self.publish(ticker, dataset, value)
+
+    def run_pending(self):
+        now = self.clock()
+        if not self.in_market_hours(now):
+            return []
+        pending = [task for task in self.watchlist() if self.due.get(task, 0) <= now]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = [(task, pool.submit(self._run, task)) for task in pending]
+        for task, future in results:
+            if future.exception() is None:
+                self.failures[task] = 0
+                # Refresh at 80% of the TTL so readers never see an expired entry
+                self.due[task] = now + 0.8 * self.ttl(task[1])
+            else:
+                self.failures[task] += 1
+                self.due[task] = now + min(POLL * 2 ** self.failures[task], MAX_BACKOFF)
+        return pending
+
+    def run_forever(self, poll=POLL):
+        while not self._stop.is_set():
+            self.run_pending()
+            self.sleep(poll)
+
+    def start(self):
+        threading.Thread(target=self.run_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+if __name__ == "__main__":
+    # Standalone warm-up process; point MARKET_CACHE_DIR at the same directory as the apps
+    Scheduler().run_forever()
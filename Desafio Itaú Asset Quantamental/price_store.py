@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+STORE_DIR = os.environ.get("PRICE_STORE_DIR", ".prices")
+# Edge fetches re-download this much of the stored history to detect a re-adjusted series
+OVERLAP = pd.Timedelta(days=7)
+
+
+def yf_fetch(tickers, start, end):
+    # Default backend: one batched yfinance call for every ticker sharing the same gap
+    import yfinance as yf
+
+    data = yf.download(tickers, start=start, end=end, auto_adjust=False, progress=False)["Adj Close"]
+    if isinstance(data, pd.Series):
+        data = data.to_frame(tickers[0])
+    return data
+
+
+class PriceStore:
+    """Adjusted close history kept on disk, one Parquet file per ticker.
+
+    Each ticker remembers the date range already requested from the backend, so
+    a new window only fetches the missing edges before and after it. `fetch` is
+    any callable with the signature of `yf_fetch`.
+
+    Adjusted closes are rewritten upstream after every dividend or split, so
+    each edge fetch overlaps the stored history by a few bars; when those
+    disagree the ticker's whole covered range is fetched again and replaced.
+    """
+
+    def __init__(self, root=STORE_DIR, fetch=yf_fetch):
+        self.root = root
+        self.fetch = fetch
+        self._lock = threading.Lock()
+        self._ticker_locks = {}
+        self._series = {}
+        os.makedirs(root, exist_ok=True)
+        self._coverage = self._load_coverage()
+
+    def _path(self, ticker):
+        return os.path.join(self.root, f"{ticker}.parquet")
+
+    def _coverage_path(self):
+        return os.path.join(self.root, "coverage.json")
+
+    def _mtime(self):
+        try:
+            return os.path.getmtime(self._coverage_path())
+        except OSError:
+            return None
+
+    def _load_coverage(self):
+        self._coverage_mtime = self._mtime()
+        try:
+            with open(self._coverage_path()) as f:
+                return {t: tuple(map(pd.Timestamp, cov)) for t, cov in json.load(f).items()}
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_coverage(self):
+        data = {t: [lo.isoformat(), hi.isoformat()] for t, (lo, hi) in self._coverage.items()}
+        with open(self._coverage_path(), "w") as f:
+            json.dump(data, f)
+        self._coverage_mtime = self._mtime()
+
+    def _sync(self):
+        # Another process (e.g. the prefetcher) wrote to the store: drop what we hold in memory
+        if self._mtime() != self._coverage_mtime:
+            self._coverage = self._load_coverage()
+            self._series = {}
+
+    def _read(self, ticker):
+        if ticker not in self._series:
+            try:
+                series = pd.read_parquet(self._path(ticker))["Adj Close"]
+            except FileNotFoundError:
+                series = pd.Series(dtype="float64", index=pd.DatetimeIndex([]))
+            self._series[ticker] = series
+        return self._series[ticker]
+
+    def _write(self, ticker, new, replace=False):
+        series = new.dropna() if replace else pd.concat([self._read(ticker), new.dropna()])
+        series = series[~series.index.duplicated(keep="last")].sort_index()
+        series.name = "Adj Close"
+        series.to_frame().to_parquet(self._path(ticker))
+        self._series[ticker] = series
+
+    def missing(self, ticker, start, end):
+        if ticker not in self._coverage:
+            gaps = [(start, end)]
+        else:
+            lo, hi = self._coverage[ticker]
+            gaps = []
+            if start < lo:
+                gaps.append((start, lo))
+            if end > hi:
+                gaps.append((hi, end))
+        # A gap with no business day (a weekend, a holiday-only stretch) has nothing to fetch
+        return [(lo, hi) for lo, hi in gaps if np.busday_count(lo.date(), hi.date()) > 0]
+
+    def _request(self, ticker, lo, hi):
+        # Widen an edge gap into the stored history so the overlap can be compared
+        if ticker not in self._coverage:
+            return lo, hi
+        cov_lo, cov_hi = self._coverage[ticker]
+        return (max(lo - OVERLAP, cov_lo), hi) if lo == cov_hi else (lo, min(hi + OVERLAP, cov_hi))
+
+    def _consistent(self, ticker, new):
+        stored = self._read(ticker)
+        common = stored.index.intersection(new.index)
+        return np.allclose(stored[common].to_numpy(), new[common].to_numpy(), rtol=1e-6)
+
+    def _fetched(self, fetched, ticker):
+        if ticker not in fetched:
+            return None
+        new = fetched[ticker].dropna()
+        return new if not new.empty else None
+
+    def _extend(self, ticker, lo, hi):
+        cov_lo, cov_hi = self._coverage.get(ticker, (lo, hi))
+        self._coverage[ticker] = (min(cov_lo, lo), max(cov_hi, hi))
+
+    def version(self, tickers):
+        # Changes whenever any of `tickers` is rewritten, in this process or another one
+        stamps = []
+        for ticker in tickers:
+            try:
+                stamps.append(os.stat(self._path(ticker)).st_mtime_ns)
+            except FileNotFoundError:
+                stamps.append(0)
+        return hashlib.sha1(json.dumps(stamps).encode()).hexdigest()[:12]
+
+    def _update(self, tickers, start, end):
+        # Network calls run outside the store lock; callers hold the per-ticker locks
+        with self._lock:
+            self._sync()
+            requests = {}
+            for ticker in tickers:
+                for lo, hi in self.missing(ticker, start, end):
+                    requests.setdefault(self._request(ticker, lo, hi), []).append(ticker)
+
+        # Coverage only grows for tickers that returned rows, so failed ones are asked for again
+        rebase = {}
+        for (lo, hi), group in requests.items():
+            fetched = self.fetch(group, lo, hi)
+            with self._lock:
+                for ticker in group:
+                    new = self._fetched(fetched, ticker)
+                    if new is None:
+                        continue
+                    if not self._consistent(ticker, new):
+                        cov_lo, cov_hi = self._coverage.get(ticker, (lo, hi))
+                        rebase.setdefault((min(cov_lo, lo), max(cov_hi, hi)), []).append(ticker)
+                        continue
+                    self._write(ticker, new)
+                    self._extend(ticker, lo, hi)
+                self._save_coverage()
+
+        for (lo, hi), group in rebase.items():
+            fetched = self.fetch(group, lo, hi)
+            with self._lock:
+                for ticker in group:
+                    new = self._fetched(fetched, ticker)
+                    if new is not None:
+                        self._write(ticker, new, replace=True)
+                        self._coverage[ticker] = (lo, hi)
+                self._save_coverage()
+
+    def get(self, tickers, start, end):
+        # `end` is exclusive like yf.download; today's bar is still forming, so stop before it
+        start = pd.Timestamp(start)
+        end = min(pd.Timestamp(end), pd.Timestamp(date.today()))
+
+        with self._lock:
+            self._sync()
+            needed = sorted({t for t in tickers if self.missing(t, start, end)})
+            locks = [self._ticker_locks.setdefault(t, threading.Lock()) for t in needed]
+
+        # Only requests for the same ticker wait on each other; sorted order avoids deadlocks
+        for lock in locks:
+            lock.acquire()
+        try:
+            if needed:
+                self._update(needed, start, end)
+        finally:
+            for lock in locks:
+                lock.release()
+
+        with self._lock:
+            prices = pd.DataFrame({t: self._read(t) for t in tickers})
+
+        return prices[(prices.index >= start) & (prices.index < end)]
@@ -0,0 +1,70 @@
+import numpy as np
+
+from analytics import TRADING_DAYS
+
+METRICS = ["volatility", "sharpe", "beta", "correlation"]
+
+
+class RollingMetrics:
+    """Rolling volatility, Sharpe, beta and correlation vs a benchmark.
+
+    Running prefix sums of x, x², y, y² and xy make every window O(1), and
+    `update` only processes dates it has not seen yet, so extending the end
+    date by a few days costs a few rows instead of the whole history.
+    """
+
+    def __init__(self, window=63):
+        self.window = window
+        self.index = []
+        self._prefix = None
+        self._out = {m: np.empty((0, 0)) for m in METRICS}
+
+    def update(self, index, r, rb):
+        # r is (dates x series) returns, rb the benchmark returns on the same dates
+        index = list(index)
+        seen = len(self.index)
+        if self._prefix is None or index[:seen] != self.index or r.shape[1] != self._prefix.shape[2]:
+            self.index, self._prefix = [], None
+            self._out = {m: np.empty((0, r.shape[1])) for m in METRICS}
+            seen = 0
+        if len(index) > seen:
+            self._extend(r[seen:], rb[seen:])
+            self.index = index
+        return {m: out[:len(index)] for m, out in self._out.items()}
+
+    def _extend(self, r, rb):
+        # Prefix sums cancel badly in single precision, so always accumulate in float64
+        r, rb = np.asarray(r, dtype=np.float64), np.asarray(rb, dtype=np.float64)
+        rb = np.broadcast_to(rb.reshape(-1, 1), r.shape)
+        valid = np.isfinite(r) & np.isfinite(rb)
+        x = np.where(valid, r, 0.0)
+        y = np.where(valid, rb, 0.0)
+        terms = np.stack([valid.astype(np.float64), x, x * x, y, y * y, x * y])
+
+        if self._prefix is None:
+            self._prefix = np.zeros((6, 1, r.shape[1]))
+        start = self._prefix.shape[1]
+        self._prefix = np.concatenate([self._prefix, self._prefix[:, -1:] + np.cumsum(terms, axis=1)], axis=1)
+
+        # Window sums for the new rows only: P[t] - P[t - window]
+        rows = np.arange(start, self._prefix.shape[1])
+        lag = rows - self.window
+        full = lag >= 0
+        window = self._prefix[:, rows] - self._prefix[:, np.maximum(lag, 0)]
+        n, sx, sxx, sy, syy, sxy = window
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mx, my = sx / n, sy / n
+            var_x = (sxx - n * mx * mx) / (n - 1)
+            var_y = (syy - n * my * my) / (n - 1)
+            cov = (sxy - n * mx * my) / (n - 1)
+            vol = np.sqrt(np.maximum(var_x, 0) * TRADING_DAYS)
+            new = {
+                "volatility": vol,
+                "sharpe": mx * TRADING_DAYS / vol,
+                "beta": cov / var_y,
+                "correlation": cov / np.sqrt(var_x * var_y),
+            }
+        for m, values in new.items():
+            values[~full] = np.nan
+            self._out[m] = np.concatenate([self._out[m], values])
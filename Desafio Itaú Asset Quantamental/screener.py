@@ -0,0 +1,149 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import common_path  # noqa: F401 - puts ../common on sys.path
+from data_cache import cache
+from service_client import service
+
+SNAPSHOT_PATH = os.environ.get("SNAPSHOT_PATH", "fundamentals.parquet")
+MAX_WORKERS = 16
+MAX_AGE = 24 * 3600
+# A refresh where more than this share of lookups fail keeps the previous snapshot
+MAX_FAILED = 0.5
+RETRY = 15 * 60
+
+# Snapshot column -> yfinance `info` field
+FIELDS = {
+    "Nome": "longName",
+    "Setor": "sector",
+    "Preço Atual": "currentPrice",
+    "Preço-Alvo": "targetMeanPrice",
+    "P/L": "trailingPE",
+    "P/VP": "priceToBook",
+    "Dividend Yield": "dividendYield",
+    "ROE": "returnOnEquity",
+    "Margem Bruta": "grossMargins",
+    "Margem EBITDA": "ebitdaMargins",
+    "Margem Líq.": "profitMargins",
+    "Valor Mercado": "marketCap",
+}
+PERCENT = ["Dividend Yield", "ROE", "Margem Bruta", "Margem EBITDA", "Margem Líq."]
+TEXT = ["Nome", "Setor"]
+
+
+def yf_info(ticker):
+    if service:
+        return cache.get(ticker, "info", lambda: service.info(ticker))
+    import yfinance as yf
+
+    return cache.get(ticker, "info", lambda: yf.Ticker(ticker).info)
+
+
+def build_snapshot(tickers, fetch_info=yf_info, max_workers=MAX_WORKERS):
+    """Columnar frame of the screening fields for every B3 code in `tickers`.
+
+    Raises when most lookups fail (an outage or rate limiting) rather than
+    returning a frame of empty rows.
+    """
+    def fetch(code):
+        try:
+            return fetch_info(code + ".SA") or {}
+        except Exception:
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        infos = list(pool.map(fetch, tickers))
+    failed = [code for code, info in zip(tickers, infos) if not info]
+    if tickers and len(failed) > MAX_FAILED * len(tickers):
+        raise RuntimeError(f"{len(failed)} de {len(tickers)} consultas falharam")
+    infos = [info or {} for info in infos]
+
+    data = {"Ticker": tickers}
+    for col, field in FIELDS.items():
+        values = [info.get(field) for info in infos]
+        data[col] = values if col in TEXT else np.array(values, dtype=np.float64)
+    frame = pd.DataFrame(data)
+    frame[PERCENT] *= 100
+    frame["Potencial"] = (frame["Preço-Alvo"] / frame["Preço Atual"] - 1) * 100
+    return frame
+
+
+def screen(frame, ranges=None, sectors=None, sort_by="Valor Mercado", ascending=False):
+    # ranges: {column: (low, high)}; rows with a missing value in a filtered column are dropped
+    mask = np.ones(len(frame), dtype=bool)
+    for col, (low, high) in (ranges or {}).items():
+        values = frame[col].to_numpy()
+        mask &= (values >= low) & (values <= high)
+    if sectors:
+        mask &= frame["Setor"].isin(sectors).to_numpy()
+    result = frame[mask]
+    values = result[sort_by].to_numpy(dtype=np.float64)
+    # Missing values always sort last
+    order = np.lexsort((values if ascending else -values, np.isnan(values)))
+    return result.iloc[order]
+
+
+class Screener:
+    """Parquet snapshot of the universe's fundamentals, refreshed by a background batch job."""
+
+    def __init__(self, path=SNAPSHOT_PATH, fetch_info=yf_info, max_workers=MAX_WORKERS, max_age=MAX_AGE):
+        self.path = path
+        self.fetch_info = fetch_info
+        self.max_workers = max_workers
+        self.max_age = max_age
+        self.error = None
+        self._failed_at = None
+        self._frame = None
+        self._mtime = None
+        self._thread = None
+
+    @property
+    def refreshing(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def age(self):
+        try:
+            return time.time() - os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def load(self):
+        # Re-read only when the background job has written a new file
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return None
+        if mtime != self._mtime:
+            self._frame = pd.read_parquet(self.path)
+            self._mtime = mtime
+        return self._frame
+
+    def refresh(self, tickers):
+        try:
+            frame = build_snapshot(tickers, self.fetch_info, self.max_workers)
+            tmp = self.path + ".tmp"
+            frame.to_parquet(tmp, index=False)
+            os.replace(tmp, self.path)
+            self.error = None
+            self._failed_at = None
+        except Exception as e:
+            # The previous file stays in place and keeps its age
+            self.error = e
+            self._failed_at = time.time()
+
+    def refresh_async(self, tickers):
+        if not self.refreshing:
+            self._thread = threading.Thread(target=self.refresh, args=(list(tickers),), daemon=True)
+            self._thread.start()
+
+    def ensure_fresh(self, tickers):
+        age = self.age()
+        if self._failed_at is not None and time.time() - self._failed_at < RETRY:
+            return
+        if age is None or age > self.max_age:
+            self.refresh_async(tickers)
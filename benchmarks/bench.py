@@ -0,0 +1,200 @@
+"""End-to-end benchmarks of both apps against the synthetic yfinance stand-in.
+
+Every scenario runs in a fresh subprocess (both apps have modules with the
+same names, and caches must start cold), drives the real app.py through
+streamlit's AppTest and reports wall time of the interaction, a warm rerun,
+peak traced memory and the number of upstream calls:
+
+    python benchmarks/bench.py --sizes 2 10 50 176 --years 1 5 10 --out results.csv
+
+With --service the apps run as thin clients of a stub data service in its own
+process, and upstream calls are the ones that service made.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APPS = {
+    "itau": os.path.join(ROOT, "Desafio Itaú Asset Quantamental"),
+    "cfa": os.path.join(ROOT, "CFA Institute Research Challenge"),
+}
+FLOWS = {"portfolio": "itau", "compare": "cfa", "single": "cfa"}
+PERIODS = {1: "1 year", 5: "5 years", 10: "10 years"}
+TIMEOUT = 600
+
+
+def universe(size):
+    with open(os.path.join(APPS["itau"], "tickers.csv")) as f:
+        codes = [line.strip().split(",")[1] for line in f if line.strip()]
+    return [c for c in codes if c != "0"][:size]
+
+
+def prepare(flow, codes):
+    # Keep background work out of the measurement: no prefetcher, and a fresh screener snapshot
+    if flow == "portfolio":
+        import screener
+        import synthetic
+
+        frame = screener.build_snapshot(universe(176), fetch_info=lambda t: synthetic.Ticker(t).info)
+        frame.to_parquet(os.environ["SNAPSHOT_PATH"], index=False)
+
+
+def drive(at, flow, codes, years):
+    if flow == "portfolio":
+        at.sidebar.date_input[0].set_value(date.today() - timedelta(days=365 * years))
+        at.sidebar.multiselect[0].set_value(codes)
+    elif flow == "compare":
+        at.text_input[1].set_value(", ".join(c + ".SA" for c in codes))
+        at.button[0].click()
+    else:
+        at.text_input(key="single_ticker").set_value(codes[0] + ".SA")
+        at.selectbox[0].set_value(PERIODS[years])
+        at.radio[0].set_value("Income Statement")
+    at.run()
+
+
+def service_calls():
+    from service_client import service
+
+    return service.stats()["upstream"] if service else None
+
+
+def worker(flow, size, years, latency):
+    app_dir = APPS[FLOWS[flow]]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, app_dir)
+    os.chdir(app_dir)
+
+    import common_path  # noqa: F401 - the app folder's shim, puts ../common on sys.path
+    import synthetic
+    from streamlit.testing.v1 import AppTest
+
+    synthetic.install(latency=0)
+    codes = universe(size)
+    prepare(flow, codes)
+
+    at = AppTest.from_file(os.path.join(app_dir, "app.py"), default_timeout=TIMEOUT)
+    at.run()
+    synthetic.install(latency=latency)
+    synthetic.calls.clear()
+    before = service_calls()
+
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    drive(at, flow, codes, years)
+    cold = time.perf_counter() - t0
+    calls = dict(synthetic.calls)
+    if before is not None:
+        calls = {k: v - before.get(k, 0) for k, v in service_calls().items() if v > before.get(k, 0)}
+
+    t0 = time.perf_counter()
+    if flow == "compare":
+        at.button[0].click()
+    at.run()
+    warm = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+
+    errors = [e.value for e in at.exception] + [e.value for e in at.error]
+    # A scenario that raised did not render the whole flow, so its timings are not comparable
+    failed = bool(errors)
+    return {
+        "flow": flow,
+        "tickers": size,
+        "years": years,
+        "cold_s": None if failed else round(cold, 3),
+        "warm_s": None if failed else round(warm, 3),
+        "peak_mb": None if failed else round(peak / 2 ** 20, 1),
+        "calls": sum(v for k, v in calls.items() if k != "download_tickers"),
+        **{f"calls_{k}": v for k, v in sorted(calls.items())},
+        "errors": len(errors),
+        "error": str(errors[0]).splitlines()[0][:200] if failed else "",
+    }
+
+
+def run(flow, size, years, latency, service=False):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, PREFETCH="0", LOGO_PREFETCH="0", LOGO_DIR=os.path.join(tmp, "logos"),
+                   PRICE_STORE_DIR=os.path.join(tmp, "prices"),
+                   SNAPSHOT_PATH=os.path.join(tmp, "fundamentals.parquet"),
+                   POPULAR_PATH=os.path.join(tmp, "popular.json"))
+        env.pop("MARKET_CACHE_DIR", None)
+        env.pop("DATA_SERVICE_URL", None)
+        stub = None
+        if service:
+            stub = subprocess.Popen(
+                [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_service.py"),
+                 "--latency", str(latency)],
+                env=dict(env, PRICE_STORE_DIR=os.path.join(tmp, "service")), stdout=subprocess.PIPE, text=True,
+            )
+            env["DATA_SERVICE_URL"] = stub.stdout.readline().strip()
+        try:
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--worker", flow, str(size), str(years), str(latency)],
+                env=env, capture_output=True, text=True,
+            )
+        finally:
+            if stub:
+                stub.terminate()
+                stub.wait()
+    if out.returncode != 0:
+        raise RuntimeError(f"{flow} {size} tickers {years}y failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def scenarios(flows, sizes, years):
+    for flow in flows:
+        for size in ([1] if flow == "single" else sizes):
+            for y in ([1] if flow == "compare" else years):
+                yield flow, size, y
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flows", nargs="+", default=list(FLOWS), choices=list(FLOWS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[2, 10, 50, 176])
+    parser.add_argument("--years", nargs="+", type=int, default=[1, 5, 10], choices=list(PERIODS))
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per synthetic upstream call")
+    parser.add_argument("--service", action="store_true", help="run the apps against a stub data service")
+    parser.add_argument("--out", help="write results to this CSV or JSON file")
+    parser.add_argument("--worker", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        flow, size, years, latency = args.worker
+        print(json.dumps(worker(flow, int(size), int(years), float(latency))))
+        return
+
+    import pandas as pd
+
+    results = []
+    for flow, size, years in scenarios(args.flows, args.sizes, args.years):
+        result = run(flow, size, years, args.latency, args.service)
+        print(json.dumps(result), flush=True)
+        results.append(result)
+
+    frame = pd.DataFrame(results)
+    calls = [c for c in frame.columns if c.startswith("calls")]
+    frame[calls] = frame[calls].fillna(0).astype(int)
+    print(frame.drop(columns="error").to_string(index=False, na_rep="FAILED"))
+    if args.out:
+        if args.out.endswith(".json"):
+            frame.to_json(args.out, orient="records", indent=2)
+        else:
+            frame.to_csv(args.out, index=False)
+
+    failed = frame[frame["errors"] > 0]
+    for row in failed.itertuples():
+        print(f"FAILED {row.flow} {row.tickers} tickers {row.years}y: {row.error}", file=sys.stderr)
+    if len(failed):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
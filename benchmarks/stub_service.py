@@ -0,0 +1,38 @@
+"""Data service backed by the synthetic yfinance, for tests and benchmarks.
+
+    python benchmarks/stub_service.py --port 8765 --latency 0.05
+    DATA_SERVICE_URL=http://127.0.0.1:8765 streamlit run app.py
+
+Prints the URL it is listening on as its first line (use --port 0 for any free port).
+"""
+import argparse
+import os
+import sys
+import threading
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), "Desafio Itaú Asset Quantamental"))
+
+import synthetic
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per synthetic upstream call")
+    parser.add_argument("--rate", type=float, default=1000.0, help="upstream calls per second")
+    args = parser.parse_args()
+
+    synthetic.install(latency=args.latency)
+    import data_service
+
+    service = data_service.DataService(limiter=data_service.RateLimiter(rate=args.rate, burst=max(1, int(args.rate))))
+    server = data_service.serve(args.host, args.port, service)
+    print(f"http://{args.host}:{server.server_address[1]}", flush=True)
+    threading.Event().wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Deterministic, offline stand-in for the parts of yfinance both apps use.
+
+`install()` registers this module as `yfinance`, so the apps import it
+unchanged. Every ticker gets its own seeded random-walk OHLC history, an
+`info` dict and annual statements. Each call sleeps for `LATENCY` seconds
+(plus `PER_TICKER` per ticker in a batched download) and is counted in `calls`.
+"""
+import sys
+import time
+import zlib
+from collections import Counter
+from datetime import date, timedelta
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+LATENCY = 0.05
+PER_TICKER = 0.005
+ORIGIN = "2005-01-03"
+SECTORS = ["Financial Services", "Energy", "Utilities", "Basic Materials", "Industrials", "Consumer Cyclical"]
+PERIODS = {"1y": 365, "5y": 5 * 365, "10y": 10 * 365}
+
+calls = Counter()
+
+
+def install(latency=None, per_ticker=None):
+    global LATENCY, PER_TICKER
+    if latency is not None:
+        LATENCY = latency
+    if per_ticker is not None:
+        PER_TICKER = per_ticker
+    sys.modules["yfinance"] = sys.modules[__name__]
+
+
+def _wait(seconds):
+    if seconds > 0:
+        time.sleep(seconds)
+
+
+def _rng(ticker, salt=0):
+    return np.random.default_rng(zlib.crc32(ticker.encode()) + salt)
+
+
+@lru_cache(maxsize=None)
+def _ohlc(ticker):
+    # Whole history from ORIGIN, so overlapping windows of the same ticker always agree
+    dates = pd.bdate_range(ORIGIN, date.today() - timedelta(days=1))
+    rng = _rng(ticker)
+    close = rng.uniform(5, 80) * np.exp(np.cumsum(rng.normal(0.0003, 0.02, len(dates))))
+    spread = np.abs(rng.normal(0, 0.01, len(dates)))
+    open_ = close * (1 + rng.normal(0, 0.005, len(dates)))
+    return pd.DataFrame({
+        "Open": open_,
+        "High": np.maximum(open_, close) * (1 + spread),
+        "Low": np.minimum(open_, close) * (1 - spread),
+        "Close": close,
+        "Adj Close": close,
+        "Volume": rng.integers(1e5, 1e7, len(dates)).astype(np.float64),
+    }, index=dates)
+
+
+def _window(ticker, start=None, end=None, period=None):
+    hist = _ohlc(ticker)
+    if period:
+        start = date.today() - timedelta(days=PERIODS.get(period, 365))
+    if start is not None:
+        hist = hist[hist.index >= pd.Timestamp(start)]
+    if end is not None:
+        hist = hist[hist.index < pd.Timestamp(end)]
+    return hist
+
+
+def download(tickers, start=None, end=None, period=None, group_by="column", auto_adjust=False,
+             progress=True, **kwargs):
+    tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+    calls["download"] += 1
+    calls["download_tickers"] += len(tickers)
+    _wait(LATENCY + PER_TICKER * len(tickers))
+
+    frames = {}
+    for ticker in tickers:
+        hist = _window(ticker, start, end, period)
+        frames[ticker] = hist.drop(columns="Adj Close") if auto_adjust else hist
+    data = pd.concat(frames, axis=1)
+    if group_by != "ticker":
+        data = data.swaplevel(axis=1).sort_index(axis=1)
+    return data
+
+
+def _statement(ticker, salt, items):
+    rng = _rng(ticker, salt)
+    years = pd.to_datetime([f"{date.today().year - i}-12-31" for i in range(1, 5)])
+    return pd.DataFrame(rng.uniform(1e8, 5e10, (len(items), len(years))), index=items, columns=years)
+
+
+class Ticker:
+    def __init__(self, ticker):
+        self.ticker = ticker
+
+    @property
+    def info(self):
+        calls["info"] += 1
+        _wait(LATENCY)
+        rng = _rng(self.ticker, 1)
+        price = float(_ohlc(self.ticker)["Close"].iloc[-1])
+        return {
+            "longName": f"{self.ticker} S.A.",
+            "sector": SECTORS[rng.integers(len(SECTORS))],
+            "industry": "Synthetic",
+            "currentPrice": price,
+            "regularMarketPrice": price,
+            "previousClose": float(_ohlc(self.ticker)["Close"].iloc[-2]),
+            "targetMeanPrice": price * rng.uniform(0.8, 1.4),
+            "trailingPE": rng.uniform(3, 40),
+            "priceToBook": rng.uniform(0.3, 6),
+            "enterpriseToEbitda": rng.uniform(2, 20),
+            "dividendYield": rng.uniform(0, 0.12),
+            "bookValue": price / rng.uniform(0.5, 4),
+            "trailingEps": price / rng.uniform(5, 30),
+            "returnOnEquity": rng.uniform(-0.1, 0.35),
+            "returnOnAssets": rng.uniform(-0.05, 0.15),
+            "grossMargins": rng.uniform(0.1, 0.7),
+            "ebitdaMargins": rng.uniform(0.05, 0.5),
+            "profitMargins": rng.uniform(-0.1, 0.3),
+            "debtToEquity": rng.uniform(0, 200),
+            "currentRatio": rng.uniform(0.5, 3),
+            "marketCap": price * rng.uniform(1e8, 5e9),
+        }
+
+    def history(self, period="1mo", **kwargs):
+        calls["history"] += 1
+        _wait(LATENCY)
+        return _window(self.ticker, period=period).drop(columns="Adj Close")
+
+    @property
+    def financials(self):
+        calls["financials"] += 1
+        _wait(LATENCY)
+        return _statement(self.ticker, 2, ["Total Revenue", "Gross Profit", "EBITDA", "Net Income"])
+
+    @property
+    def balance_sheet(self):
+        calls["balance_sheet"] += 1
+        _wait(LATENCY)
+        return _statement(self.ticker, 3, ["Total Assets", "Total Liabilities Net Minority Interest",
+                                           "Stockholders Equity", "Total Debt", "Cash And Cash Equivalents"])
+
+    @property
+    def cashflow(self):
+        calls["cashflow"] += 1
+        _wait(LATENCY)
+        return _statement(self.ticker, 4, ["Operating Cash Flow", "Capital Expenditure", "Free Cash Flow"])
@@ -0,0 +1,164 @@
+import contextvars
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+
+# Seconds each dataset stays fresh; "history:1y" style keys use the part before ":"
+TTLS = {
+    "info": 15 * 60,
+    "history": 15 * 60,
+    "financials": 24 * 3600,
+    "balance_sheet": 24 * 3600,
+    "cashflow": 24 * 3600,
+}
+DEFAULT_TTL = 15 * 60
+MAX_ENTRIES = 512
+CACHE_DIR = os.environ.get("MARKET_CACHE_DIR")
+# Counters of the run open in the current context; worker threads join it through copy_context()
+_run_counts = contextvars.ContextVar("cache_run_counts", default=None)
+
+
+def payload_size(value):
+    # Rough size of a fetched payload: frame memory for pandas objects, pickle length otherwise
+    if value is None:
+        return 0
+    if hasattr(value, "memory_usage"):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+    try:
+        return len(pickle.dumps(value))
+    except Exception:
+        return 0
+
+
+class DataCache:
+    """In-memory LRU keyed by (ticker, dataset) with per-dataset TTLs.
+
+    When `disk_dir` is set, entries are also pickled there so they survive
+    restarts and can be shared between processes.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttls=TTLS, disk_dir=CACHE_DIR, clock=time.time):
+        self.max_entries = max_entries
+        self.ttls = ttls
+        self.disk_dir = disk_dir
+        self.clock = clock
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.loaded_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _count(self, **amounts):
+        counts = _run_counts.get()
+        with self._lock:
+            for name, amount in amounts.items():
+                setattr(self, name, getattr(self, name) + amount)
+                if counts is not None:
+                    counts[name] += amount
+
+    def start_counting(self):
+        """Counts hits, misses and loaded bytes of the current context apart from the global totals.
+
+        Returns the Counter that fills up until `stop_counting` is called, so a
+        run's numbers are not mixed with those of runs on other threads.
+        """
+        counts = Counter(dict.fromkeys(["hits", "disk_hits", "misses", "loaded_bytes"], 0))
+        _run_counts.set(counts)
+        return counts
+
+    def stop_counting(self):
+        _run_counts.set(None)
+
+    def ttl(self, dataset):
+        return self.ttls.get(dataset.split(":")[0], DEFAULT_TTL)
+
+    def _path(self, key):
+        # Tickers are free text in the CFA app, so the file name is a hash and never a path
+        name = hashlib.sha1(json.dumps(key).encode()).hexdigest()
+        return os.path.join(self.disk_dir, name + ".pkl")
+
+    def _read_disk(self, key, now):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                expires, value = pickle.load(f)
+        except (OSError, pickle.PickleError, EOFError):
+            return None
+        return (expires, value) if expires > now else None
+
+    def _write_disk(self, key, expires, value):
+        if not self.disk_dir:
+            return
+        tmp = self._path(key) + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump((expires, value), f)
+        os.replace(tmp, self._path(key))
+
+    def _remember(self, key, expires, value):
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def lookup(self, ticker, dataset):
+        # Returns (found, value) without calling any loader
+        key = (ticker, dataset)
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            fresh = entry is not None and entry[0] > now
+            if fresh:
+                self._entries.move_to_end(key)
+        if fresh:
+            self._count(hits=1)
+            return True, entry[1]
+        entry = self._read_disk(key, now)
+        if entry:
+            self._count(disk_hits=1)
+            self._remember(key, *entry)
+            return True, entry[1]
+        return False, None
+
+    def put(self, ticker, dataset, value):
+        key = (ticker, dataset)
+        expires = self.clock() + self.ttl(dataset)
+        self._remember(key, expires, value)
+        self._write_disk(key, expires, value)
+
+    def miss(self, count=1):
+        self._count(misses=count)
+
+    def loaded(self, value):
+        self._count(loaded_bytes=payload_size(value))
+
+    def get(self, ticker, dataset, loader):
+        found, value = self.lookup(ticker, dataset)
+        if found:
+            return value
+        self.miss()
+        value = loader()
+        self.loaded(value)
+        self.put(ticker, dataset, value)
+        return value
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "loaded_bytes": self.loaded_bytes,
+            "entries": len(self._entries),
+        }
+
+
+cache = DataCache()
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+POINTS = 800
+MAX_CANDLES = 400
+# Coarsest bar size last; the first one that fits in MAX_CANDLES is used
+BAR_RULES = {"daily": None, "weekly": pd.offsets.Week(weekday=6), "monthly": pd.offsets.MonthEnd()}
+
+
+def lttb(y, n=POINTS):
+    """Row indices of `y` kept by Largest-Triangle-Three-Buckets.
+
+    `y` is (rows,) or (rows x series). With several series the rows are shared:
+    each bucket keeps the row whose triangles, summed over every series scaled
+    to its own range, are largest, so the peaks of every line survive.
+    """
+    rows = len(y)
+    if n >= rows or n < 3:
+        return np.arange(rows)
+    y = np.asarray(y, dtype=np.float64).reshape(rows, -1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        low, high = np.nanmin(y, axis=0), np.nanmax(y, axis=0)
+        y = np.nan_to_num((y - low) / np.where(high > low, high - low, 1.0))
+    x = np.arange(rows, dtype=np.float64)
+
+    edges = np.linspace(1, rows - 1, n - 1).astype(np.int64)
+    keep = np.empty(n, dtype=np.int64)
+    keep[0], keep[-1] = 0, rows - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            cx, cy = x[hi:edges[i + 2]].mean(), y[hi:edges[i + 2]].mean(axis=0)
+        else:
+            cx, cy = x[-1], y[-1]
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi, None]) * (cy - y[a])).sum(axis=1)
+        a = keep[i + 1] = lo + np.argmax(area)
+    return keep
+
+
+def downsample(frame, n=POINTS):
+    # Lines: one shared set of rows for every column, so the frame can go to st.line_chart as is
+    return frame.iloc[lttb(frame.to_numpy(dtype=np.float64), n)]
+
+
+def ohlc_bars(hist, max_bars=MAX_CANDLES):
+    """Daily candles aggregated into the finest of weekly or monthly bars that fits in `max_bars`."""
+    for label, rule in BAR_RULES.items():
+        bars = hist if rule is None else hist.resample(rule).agg(
+            {c: f for c, f in {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}.items()
+             if c in hist.columns}
+        ).dropna(subset=["Close"])
+        if len(bars) <= max_bars:
+            break
+    return bars, label
+
+
+def bounds(index):
+    # First and last dates as naive datetimes, the form st.slider accepts
+    index = index if index.tz is None else index.tz_localize(None)
+    return index[0].to_pydatetime(), index[-1].to_pydatetime()
+
+
+def window(index, start, end):
+    # Boolean mask of the dates inside a zoom range picked with a date slider
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    if index.tz is not None:
+        start, end = start.tz_localize(index.tz), end.tz_localize(index.tz)
+    return (index >= start) & (index <= end)
@@ -0,0 +1,151 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+from data_cache import cache, payload_size
+
+STAGES = ["fetch", "compute", "format", "chart"]
+MAX_RUNS = 200
+
+
+class Profiler:
+    """Per-rerun stage timings, cache hits/misses and downloaded bytes.
+
+    Each Streamlit script run happens on its own thread, so the open run is
+    thread-local while finished runs go to a bounded, process-wide history
+    tagged with the session that produced them. Cache events are counted in
+    the run's own context, so runs of other sessions never leak into them.
+    """
+
+    def __init__(self, max_runs=MAX_RUNS):
+        self.runs = deque(maxlen=max_runs)
+        self._local = threading.local()
+        self._ids = 0
+        self._lock = threading.Lock()
+
+    @property
+    def current(self):
+        return getattr(self._local, "run", None)
+
+    def start_run(self, app):
+        # A run left open on this thread is closed here; the apps close theirs in a finally block,
+        # since Streamlit starts every rerun on a new thread
+        self.end_run()
+        with self._lock:
+            self._ids += 1
+            run_id = self._ids
+        self._local.run = {
+            "run": run_id,
+            "app": app,
+            "started": datetime.now().isoformat(timespec="seconds"),
+            "stages": [],
+            "fetches": 0,
+            "bytes": 0,
+            "session": session_id(),
+            "_t0": time.perf_counter(),
+            "_cache": cache.start_counting(),
+        }
+
+    def end_run(self):
+        run = self.current
+        if run is None:
+            return None
+        run["seconds"] = time.perf_counter() - run.pop("_t0")
+        for key, value in run.pop("_cache").items():
+            run[f"cache_{key}"] = value
+        cache.stop_counting()
+        self._local.run = None
+        self.runs.append(run)
+        return run
+
+    @contextmanager
+    def stage(self, stage, label=""):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            run = self.current
+            if run is not None:
+                run["stages"].append({"stage": stage, "label": label, "seconds": time.perf_counter() - t0})
+
+    def track_fetch(self, fetch):
+        # Wraps a fetch backend to count calls and payload bytes in the open run
+        def tracked(*args, **kwargs):
+            result = fetch(*args, **kwargs)
+            run = self.current
+            if run is not None:
+                run["fetches"] += 1
+                run["bytes"] += payload_size(result)
+            return result
+
+        return tracked
+
+    def history(self, session=None):
+        # Finished runs, only those of `session` when given
+        return [run for run in list(self.runs) if session is None or run["session"] == session]
+
+    def records(self, session=None):
+        # One flat row per stage, ready for CSV
+        rows = []
+        for run in self.history(session):
+            base = {k: v for k, v in run.items() if k != "stages"}
+            for stage in run["stages"]:
+                rows.append({**base, **stage})
+        return rows
+
+    def summary(self, session=None):
+        frame = pd.DataFrame(self.records(session))
+        if frame.empty:
+            return frame
+        return frame.groupby("stage")["seconds"].describe(percentiles=[0.5, 0.95])
+
+    def to_json(self, session=None):
+        return json.dumps(self.history(session), indent=2, default=str)
+
+    def to_csv(self, session=None):
+        return pd.DataFrame(self.records(session)).to_csv(index=False)
+
+
+def session_id():
+    # Streamlit session of the script run on this thread; None outside a Streamlit run
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else None
+
+
+profiler = Profiler()
+
+
+def debug_panel():
+    """Sidebar expander with this session's last run, per-stage percentiles and exports.
+
+    Shown when the page is opened with ?debug=1 or DEBUG_TIMINGS=1 is set.
+    """
+    import streamlit as st
+
+    if os.environ.get("DEBUG_TIMINGS") != "1" and st.query_params.get("debug") != "1":
+        return
+    with st.sidebar.expander("⏱️ Debug timings"):
+        session = session_id()
+        runs = profiler.history(session)
+        if not runs:
+            st.caption("No finished runs yet.")
+            return
+        last = runs[-1]
+        st.caption(f"Last run: {last['seconds'] * 1000:.0f} ms, {last['fetches']} fetches, "
+                   f"{(last['bytes'] + last['cache_loaded_bytes']) / 1e3:.1f} kB, cache {last['cache_hits'] + last['cache_disk_hits']} hits / "
+                   f"{last['cache_misses']} misses")
+        st.dataframe(pd.DataFrame(last["stages"]), use_container_width=True)
+        st.dataframe(profiler.summary(session), use_container_width=True)
+        col1, col2 = st.columns(2)
+        col1.download_button("JSON", profiler.to_json(session), "timings.json", "application/json")
+        col2.download_button("CSV", profiler.to_csv(session), "timings.csv", "text/csv")
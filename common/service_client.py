@@ -0,0 +1,82 @@
+import os
+
+import pandas as pd
+
+SERVICE_URL = os.environ.get("DATA_SERVICE_URL")
+POOL_SIZE = 16
+TIMEOUT = 120
+
+
+def to_arrow(frame):
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(frame)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def from_arrow(body):
+    import pyarrow as pa
+
+    return pa.ipc.open_stream(body).read_pandas()
+
+
+class ServiceClient:
+    """Thin client of the local data service (data_service.py in the Itaú app).
+
+    Mirrors the few upstream calls the apps make; frames travel as Arrow IPC
+    streams over one pooled keep-alive session shared by every thread.
+    """
+
+    def __init__(self, url=SERVICE_URL, pool_size=POOL_SIZE, timeout=TIMEOUT):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+
+    def _get(self, path, **params):
+        response = self.session.get(f"{self.url}/{path}", params=params, timeout=self.timeout)
+        if response.status_code != 200:
+            try:
+                message = response.json()["error"]
+            except ValueError:
+                message = response.text
+            raise RuntimeError(f"{path}: {message}")
+        return response
+
+    def get(self, tickers, start, end):
+        # Same signature as PriceStore.get, so it can stand in for the local store
+        frame = from_arrow(self._get("prices", tickers=",".join(tickers), start=str(pd.Timestamp(start).date()),
+                                     end=str(pd.Timestamp(end).date())).content)
+        return frame.reindex(columns=list(tickers))
+
+    def version(self, tickers):
+        # Same as PriceStore.version, for the service's own store
+        return self._get("version", tickers=",".join(tickers)).json()["version"]
+
+    def info(self, ticker):
+        return self._get("info", ticker=ticker).json()
+
+    def history(self, ticker, period="1y"):
+        return from_arrow(self._get("history", ticker=ticker, period=period).content)
+
+    def histories(self, tickers, period="1y"):
+        # One request for the batch; the wide frame has (ticker, field) columns like yf.download(group_by="ticker")
+        data = from_arrow(self._get("histories", tickers=",".join(tickers), period=period).content)
+        if data.empty:
+            return {}
+        return {t: data[t].dropna(how="all") for t in tickers if t in data.columns.get_level_values(0)}
+
+    def statement(self, ticker, name):
+        return from_arrow(self._get("statement", ticker=ticker, name=name).content)
+
+    def stats(self):
+        return self._get("stats").json()
+
+
+service = ServiceClient() if SERVICE_URL else None
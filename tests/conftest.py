@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The apps are plain script folders, not packages; import the Itaú modules from their own directory
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "Desafio Itaú Asset Quantamental"))
@@ -0,0 +1,99 @@
+from datetime import datetime, timezone
+
+import pytest
+
+import prefetch
+from prefetch import MAX_BACKOFF, POLL, Scheduler
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakePopularity:
+    def __init__(self, codes=()):
+        self.codes = list(codes)
+
+    def top(self, n=prefetch.TOP_N):
+        return self.codes[:n]
+
+
+# Monday 2024-03-04, 12:00 in São Paulo (UTC-3)
+MARKET_OPEN = datetime(2024, 3, 4, 15, 0, tzinfo=timezone.utc).timestamp()
+
+
+def make(fetch, now=MARKET_OPEN, **kwargs):
+    published = []
+    clock = FakeClock(now)
+    scheduler = Scheduler(fetch=fetch, popularity=FakePopularity(kwargs.pop("codes", ())),
+                          publish=lambda *args: published.append(args), ttl=lambda dataset: 100,
+                          clock=clock, shared=kwargs.pop("shared", False), **kwargs)
+    return scheduler, clock, published
+
+
+def test_run_pending_fetches_every_task_once_until_due():
+    calls = []
+    scheduler, clock, published = make(lambda t, d: calls.append((t, d)) or "value", codes=["PETR4"])
+
+    pending = scheduler.run_pending()
+    assert pending == [("^BVSP", "prices"), ("PETR4.SA", "prices")]
+    assert sorted(calls) == sorted(pending)
+    assert len(published) == 2
+
+    clock.now += 79
+    assert scheduler.run_pending() == []
+    clock.now += 1
+    assert len(scheduler.run_pending()) == 2
+
+
+def test_failures_back_off_exponentially_and_reset():
+    fail = {"on": True}
+
+    def fetch(ticker, dataset):
+        if fail["on"]:
+            raise RuntimeError("upstream down")
+
+    scheduler, clock, _ = make(fetch)
+    start = clock.now
+    scheduler.run_pending()
+    assert scheduler.due[("^BVSP", "prices")] == start + POLL * 2
+
+    clock.now = scheduler.due[("^BVSP", "prices")]
+    scheduler.run_pending()
+    assert scheduler.due[("^BVSP", "prices")] == clock.now + POLL * 4
+
+    scheduler.failures[("^BVSP", "prices")] = 20
+    clock.now = scheduler.due[("^BVSP", "prices")]
+    scheduler.run_pending()
+    assert scheduler.due[("^BVSP", "prices")] == clock.now + MAX_BACKOFF
+
+    fail["on"] = False
+    clock.now = scheduler.due[("^BVSP", "prices")]
+    scheduler.run_pending()
+    assert scheduler.failures[("^BVSP", "prices")] == 0
+    assert scheduler.due[("^BVSP", "prices")] == clock.now + 80
+
+
+@pytest.mark.parametrize("day, utc_hour, expected", [
+    (4, 12, True),   # Monday 09:00 in São Paulo
+    (4, 11, False),  # 08:00
+    (4, 21, True),   # 18:00
+    (4, 22, False),  # 19:00
+    (9, 15, False),  # Saturday
+])
+def test_market_hours_follow_sao_paulo(day, utc_hour, expected):
+    now = datetime(2024, 3, day, utc_hour, 0, tzinfo=timezone.utc).timestamp()
+    scheduler, _, _ = make(lambda t, d: None, now=now)
+    assert scheduler.in_market_hours(now) is expected
+    assert bool(scheduler.run_pending()) is expected
+
+
+def test_shared_tasks_need_a_shared_cache():
+    local, _, _ = make(lambda t, d: None)
+    shared, _, _ = make(lambda t, d: None, shared=True)
+    assert {t for t, _ in local.watchlist()} == {"^BVSP"}
+    assert {"AAPL", "MSFT", "GOOGL"} <= {t for t, _ in shared.watchlist()}
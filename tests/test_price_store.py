@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from price_store import PriceStore
+
+
+class FakeDownloader:
+    """Business-day closes from `prices(ticker, dates)`; records every call like a batched yf.download."""
+
+    def __init__(self, prices=None, fail=()):
+        self.prices = prices or (lambda ticker, dates: np.arange(len(dates), dtype=float) + 1)
+        self.fail = set(fail)
+        self.calls = []
+
+    def __call__(self, tickers, start, end):
+        self.calls.append((tuple(tickers), pd.Timestamp(start), pd.Timestamp(end)))
+        index = pd.bdate_range(start, pd.Timestamp(end) - pd.Timedelta(days=1))
+        return pd.DataFrame({t: self.prices(t, index) for t in tickers if t not in self.fail}, index=index)
+
+
+def day_number(ticker, dates):
+    # A price that only depends on the date, so overlapping fetches always agree
+    return (dates - pd.Timestamp("2020-01-01")).days.to_numpy(dtype=float)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceStore(root=str(tmp_path), fetch=FakeDownloader(day_number))
+
+
+def test_missing_reports_only_uncovered_edges(store):
+    start, end = pd.Timestamp("2024-02-01"), pd.Timestamp("2024-03-01")
+    assert store.missing("PETR4.SA", start, end) == [(start, end)]
+
+    store.get(["PETR4.SA"], start, end)
+    assert store.missing("PETR4.SA", start, end) == []
+    assert store.missing("PETR4.SA", pd.Timestamp("2024-01-01"), end) == [(pd.Timestamp("2024-01-01"), start)]
+    # Covered up to Saturday 2024-03-02; the rest of the weekend has nothing to fetch
+    store.get(["PETR4.SA"], start, pd.Timestamp("2024-03-02"))
+    assert store.missing("PETR4.SA", start, pd.Timestamp("2024-03-04")) == []
+
+
+def test_get_fetches_each_gap_once_and_batches_tickers(store):
+    prices = store.get(["A", "B"], "2024-02-01", "2024-03-01")
+    assert store.fetch.calls == [(("A", "B"), pd.Timestamp("2024-02-01"), pd.Timestamp("2024-03-01"))]
+    assert list(prices.columns) == ["A", "B"]
+    assert prices.index.min() == pd.Timestamp("2024-02-01")
+    assert prices.index.max() < pd.Timestamp("2024-03-01")
+
+    store.get(["A", "B"], "2024-02-05", "2024-02-20")
+    assert len(store.fetch.calls) == 1
+
+
+def test_extending_a_window_fetches_only_the_new_edge_with_overlap(store):
+    store.get(["A"], "2024-02-01", "2024-03-01")
+    prices = store.get(["A"], "2024-02-01", "2024-04-01")
+    _, lo, hi = store.fetch.calls[-1]
+    assert lo < pd.Timestamp("2024-03-01") and hi == pd.Timestamp("2024-04-01")
+    np.testing.assert_array_equal(prices["A"].to_numpy(), day_number("A", prices.index))
+
+
+def test_failed_tickers_stay_missing(tmp_path):
+    store = PriceStore(root=str(tmp_path), fetch=FakeDownloader(day_number, fail={"B"}))
+    store.get(["A", "B"], "2024-02-01", "2024-03-01")
+    assert store.missing("A", pd.Timestamp("2024-02-01"), pd.Timestamp("2024-03-01")) == []
+    assert store.missing("B", pd.Timestamp("2024-02-01"), pd.Timestamp("2024-03-01")) != []
+
+
+def test_readjusted_history_is_replaced(tmp_path):
+    fetch = FakeDownloader(day_number)
+    store = PriceStore(root=str(tmp_path), fetch=fetch)
+    store.get(["A"], "2024-02-01", "2024-03-01")
+
+    # A 2:1 split rescales every past adjusted close
+    fetch.prices = lambda ticker, dates: day_number(ticker, dates) / 2
+    prices = store.get(["A"], "2024-02-01", "2024-04-01")
+    np.testing.assert_allclose(prices["A"].to_numpy(), day_number("A", prices.index) / 2)
+
+
+def test_a_second_store_sees_writes_from_another_process(tmp_path):
+    first = PriceStore(root=str(tmp_path), fetch=FakeDownloader(day_number))
+    second = PriceStore(root=str(tmp_path), fetch=FakeDownloader(day_number))
+    first.get(["A"], "2024-02-01", "2024-03-01")
+    second.get(["A"], "2024-02-01", "2024-03-01")
+    assert second.fetch.calls == []
+
+
+def test_failed_refetch_keeps_the_stored_history(tmp_path):
+    fetch = FakeDownloader(day_number)
+    store = PriceStore(root=str(tmp_path), fetch=fetch)
+    store.get(["A"], "2024-02-01", "2024-03-01")
+
+    # The overlap disagrees, then the full re-fetch returns nothing
+    fetch.prices = lambda ticker, dates: day_number(ticker, dates) / 2
+    calls = []
+
+    def flaky(tickers, start, end):
+        calls.append((start, end))
+        return fetch(tickers, start, end) if len(calls) == 1 else pd.DataFrame(index=pd.DatetimeIndex([]))
+
+    store.fetch = flaky
+    prices = store.get(["A"], "2024-02-01", "2024-04-01")
+    stored = prices["A"].dropna()
+    np.testing.assert_array_equal(stored.to_numpy(), day_number("A", stored.index))
+    assert stored.index.max() < pd.Timestamp("2024-03-01")
+    assert store.missing("A", pd.Timestamp("2024-02-01"), pd.Timestamp("2024-04-01")) != []